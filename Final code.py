@@ -2,7 +2,6 @@
 # === Monitoring & Logging Code ===
 import os
 import time
-import pyautogui
 import psutil
 import pygetwindow as gw
 from pynput import keyboard as pynput_keyboard, mouse
@@ -12,34 +11,54 @@ import mediapipe as mp
 from datetime import datetime, timedelta
 from threading import Thread
 from collections import defaultdict, Counter
+from activity_events import EventWriter, VisionIntervalLog
+from process_tracker import ProcessTracker
+from vision_replay import ActivityDescriber, FrameClock, open_frame_source, replay_output_path
+from app_classifier import load_classifier
+from frame_encoder import FrameEncoder
+from screen_capture import open_capture
+from vision_scheduler import VisionScheduler
 # Paths
 snapshot_dir = 'D:/Snapshots'
 recording_dir = 'D:/ScreenRecordings'
 os.makedirs(snapshot_dir, exist_ok=True)
 os.makedirs(recording_dir, exist_ok=True)
 
-log_file_path = os.path.join(recording_dir, "sop_activity_log.txt")
-vision_log_path = os.path.join(recording_dir, "vision_activity_log.txt")
+log_file_path = os.path.join(recording_dir, "sop_activity_log.evt")
+vision_log_path = os.path.join(recording_dir, "vision_activity_log.evt")
 report_output_path = os.path.join(recording_dir, "user_activity_analysis_report.txt")
 video_path = os.path.join(recording_dir, "activity_detected.avi")
+app_rules_path = os.path.join(recording_dir, "app_rules.json")  # optional custom classification rules
 
 # Flags & Logs
 recording = True
-key_log, click_log, activity_log = [], [], []
+key_log, click_log = [], []
+LOG_BATCH_SIZE = 30        # entries buffered before a write
+LOG_FLUSH_INTERVAL = 5.0   # seconds between writes when idle
+LOG_FSYNC_EVERY = 6        # fsync the log every N writes
+activity_log = EventWriter(log_file_path, LOG_BATCH_SIZE, LOG_FLUSH_INTERVAL, LOG_FSYNC_EVERY)
 
 # Mediapipe
 mp_face, mp_hands, mp_drawing = mp.solutions.face_mesh, mp.solutions.hands, mp.solutions.drawing_utils
 face_mesh = mp_face.FaceMesh(min_detection_confidence=0.5, min_tracking_confidence=0.5)
 hands = mp_hands.Hands(min_detection_confidence=0.5, min_tracking_confidence=0.5)
-
-cap = cv2.VideoCapture(0)
-fourcc = cv2.VideoWriter_fourcc(*'XVID')
-out = cv2.VideoWriter(video_path, fourcc, 10.0, (640, 480))
-vision_log_file = open(vision_log_path, "w")
+VISION_PROFILE = "balanced"  # "accuracy", "balanced" or "low_cpu": how often face/hand models run
+vision_scheduler = VisionScheduler(face_mesh, hands, VISION_PROFILE)
+describe_activity = ActivityDescriber(face_details=False)
+
+VISION_SOURCE = 0  # webcam index, or a recording / image folder to replay as fast as it decodes
+cap = open_frame_source(VISION_SOURCE)
+vision_clock = FrameClock(cap, VISION_SOURCE)  # wall time live, source time for a replay
+video_path = replay_output_path(VISION_SOURCE, video_path)  # never record over the file being replayed
+screen_capture = open_capture()  # snapshots (mss when installed, else pyautogui)
+VIDEO_OVERFLOW = "drop_oldest"  # encoder queue full: "block", "drop_oldest" or "drop_newest"
+out = FrameEncoder(video_path, 10.0, (640, 480), "XVID", overflow=VIDEO_OVERFLOW)  # encodes off the vision loop
+VISION_HEARTBEAT = 30  # seconds; an unchanged vision state is still written out this often (None = only on change)
+vision_log_file = VisionIntervalLog(EventWriter(vision_log_path, batch_size=16), VISION_HEARTBEAT)
 
 def on_click(x, y, button, pressed):
     if pressed:
-        click_log.append(f"Mouse clicked at ({x}, {y}) with {button}")
+        click_log.append((x, y, button))
 
 def on_press(key):
     try:
@@ -47,46 +66,29 @@ def on_press(key):
     except:
         key_log.append(f"Special key pressed: {key}")
 
-def detect_running_browsers(process_list):
-    browsers = ['chrome', 'firefox', 'msedge', 'brave', 'opera', 'iexplore']
-    return list(set([p for p in process_list if any(browser in p.lower() for browser in browsers)]))
-
-def detect_open_documents(process_list):
-    doc_types = {
-        'Word': ['winword'], 'Excel': ['excel'], 'PowerPoint': ['powerpnt'],
-        'PDF Reader': ['acrord32', 'foxit', 'pdf'], 'Notepad': ['notepad'],
-        'VSCode': ['code'], 'Notepad++': ['notepad++']
-    }
-    open_docs = []
-    for name, keywords in doc_types.items():
-        if any(any(k in proc.lower() for k in keywords) for proc in process_list):
-            open_docs.append(name)
-    return open_docs
+app_classifier = load_classifier(app_rules_path)
+process_tracker = ProcessTracker(app_classifier.classify)
 
 def monitor_thread():
     while recording:
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        timestamp = datetime.now()
         try:
             active_window = gw.getActiveWindow().title
         except:
             active_window = "Unknown"
 
-        processes = [p.info['name'] for p in psutil.process_iter(['name']) if p.info['name']]
-        unique_processes = list(set(processes))
-        running_browsers = detect_running_browsers(unique_processes)
-        open_documents = detect_open_documents(unique_processes)
+        started, exited = process_tracker.scan()
+        activity_log.process_events(timestamp, started + exited)
+        unique_processes = process_tracker.names()
+        running_browsers = process_tracker.labels("browser")
+        open_documents = process_tracker.labels("document")
 
         battery = psutil.sensors_battery()
         battery_status = f"{battery.percent}% {'Plugged In' if battery.power_plugged else 'On Battery'}" if battery else "Battery Info Unavailable"
-        music_status = "Possibly Playing" if any("spotify" in p.lower() or "chrome" in p.lower() for p in unique_processes) else "Not Detected"
-
-        log_entry = f"\n[{timestamp}]\nActive Window: {active_window}\nMouse Clicks: {click_log.copy()}\nKeys Pressed: {key_log.copy()}\n"
-        log_entry += f"Running Browsers: {', '.join(running_browsers) if running_browsers else 'None'}\n"
-        log_entry += f"Open Documents: {', '.join(open_documents) if open_documents else 'None'}\n"
-        log_entry += f"Top Background Apps: {', '.join(unique_processes[:5])}\nMusic Status: {music_status}\nBattery: {battery_status}\n"
-        log_entry += "-" * 60
+        music_status = "Possibly Playing" if process_tracker.labels("music") else "Not Detected"
 
-        activity_log.append(log_entry)
+        activity_log.screen_tick(timestamp, active_window, click_log.copy(), key_log.copy(), running_browsers,
+                                 open_documents, unique_processes[:5], music_status, battery_status)
         click_log.clear()
         key_log.clear()
         time.sleep(1)
@@ -96,7 +98,7 @@ def snapshot_listener():
         if keyboard.is_pressed('s'):
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = os.path.join(snapshot_dir, f"screen_{timestamp}.png")
-            pyautogui.screenshot().save(filename)
+            cv2.imwrite(filename, screen_capture.grab_full())
             print(f"✅ Snapshot saved: {filename}")
             time.sleep(0.5)
         elif keyboard.is_pressed('q'):
@@ -108,28 +110,18 @@ def vision_capture():
         ret, frame = cap.read()
         if not ret:
             break
+        timestamp = vision_clock()
+
+        # Models run on the scheduler's cadence; skipped frames reuse the last results
+        face_results, hand_results, inferred = vision_scheduler.process(frame)
+        activity = describe_activity(face_results, hand_results)
+
+        for face_landmarks in face_results.multi_face_landmarks or []:
+            mp_drawing.draw_landmarks(frame, face_landmarks, mp_face.FACEMESH_CONTOURS)
+        for hand_landmarks in hand_results.multi_hand_landmarks or []:
+            mp_drawing.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
 
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        face_results = face_mesh.process(frame_rgb)
-        hand_results = hands.process(frame_rgb)
-        activity_text = []
-
-        if face_results.multi_face_landmarks:
-            activity_text.append("Face detected")
-            for face_landmarks in face_results.multi_face_landmarks:
-                mp_drawing.draw_landmarks(frame, face_landmarks, mp_face.FACEMESH_CONTOURS)
-        else:
-            activity_text.append("No face detected")
-
-        if hand_results.multi_hand_landmarks:
-            activity_text.append(f"{len(hand_results.multi_hand_landmarks)} hand(s) detected")
-            for hand_landmarks in hand_results.multi_hand_landmarks:
-                mp_drawing.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-        else:
-            activity_text.append("No hands detected")
-
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        vision_log_file.write(f"{timestamp} - {', '.join(activity_text)}\n")
+        vision_log_file.vision_frame(timestamp, activity, inferred)
         out.write(frame)
 
 # Start Listeners
@@ -157,12 +149,15 @@ except KeyboardInterrupt:
 finally:
     cap.release()
     out.release()
+    print(f"🎞️ Encoder: {out.summary()}")
+    print(f"👁️ Vision scheduler: {vision_scheduler.summary()}")
+    print(f"📑 Vision log: {vision_log_file.summary()}")
     vision_log_file.close()
+    vision_scheduler.close()
     face_mesh.close()
     hands.close()
     cv2.destroyAllWindows()
-    with open(log_file_path, "w", encoding="utf-8") as f:
-        f.write("Activity Log Summary\n" + "="*50 + "\n" + '\n'.join(activity_log))
+    activity_log.close()
 
     print(f"📄 Logs saved to: {log_file_path}")
     print(f"📽️ Video saved to: {video_path}")
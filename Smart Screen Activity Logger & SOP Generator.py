@@ -1,26 +1,41 @@
 import cv2
-import numpy as np
-import pyautogui
 import os
-import torch
-from transformers import BlipProcessor, BlipForConditionalGeneration
 from datetime import datetime
+from functools import partial
 from pynput import keyboard, mouse
 import pygetwindow as gw
-import pytesseract
-from PIL import Image
 import threading
 import time
+from blip_captioner import BlipCaptioner, caption_video
+from frame_change import ChangeGate
+from ocr_engine import OcrPool
+from screen_capture import open_capture
+from screen_recorder import PacedRecorder
+from step_writer import OrderedStepWriter
 
 # === CONFIGURATION ===
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
-SCREEN_SIZE = pyautogui.size()
-VIDEO_PATH = "D:/screen_recording1.avi"
+TESSERACT_CMD = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+CAPTURE_BACKEND = "auto"  # "mss", "pyautogui" or "synthetic" (headless testing)
+capture = open_capture(CAPTURE_BACKEND)
+SCREEN_SIZE = capture.size
+RECORD_FORMAT = "video"  # "video" (XVID .avi) or "tiles" (only changed screen tiles, see tile_recording.py)
+VIDEO_PATH = "D:/screen_recording1.avi" if RECORD_FORMAT == "video" else "D:/screen_recording1.tiles"
 OUTPUT_TEXT = "D:/video_to_text_sop.txt"
 LOG_PATH = "D:/user_activity_log.txt"
 SNAPSHOT_FOLDER = "D:/button_snapshots"
 FRAME_INTERVAL = 30
 FPS = 20.0
+RECORD_SCALE = 1.0       # downscale recorded frames (e.g. 0.5) to cut encode cost
+RECORD_CROP = None       # (left, top, width, height) to record only part of the screen
+RECORD_OVERFLOW = "block"  # encoder queue full: "block" keeps frame count = wall time; "drop_oldest"/"drop_newest" drop frames
+CAPTION_BATCH_SIZE = 8   # sampled frames per BLIP generate() call
+TORCH_THREADS = None     # CPU threads for torch (None = torch default)
+PREPROCESS_WORKERS = 2   # threads converting frames to RGB while BLIP runs
+PIPELINE_QUEUE_SIZE = 16 # frames buffered between pipeline stages
+OCR_WORKERS = 2          # threads running Tesseract for clicks
+MAX_PENDING_CLICKS = 32  # clicks waiting for OCR before new clicks skip it
+OCR_POOL_SIZE = OCR_WORKERS  # long-lived Tesseract engines (in-process when tesserocr is installed);
+                             # more than one runs each single-threaded (OMP_THREAD_LIMIT=1)
 
 os.makedirs(SNAPSHOT_FOLDER, exist_ok=True)
 
@@ -31,17 +46,18 @@ typed_text_buffer = ""
 last_window = None
 step_counter = 1
 step_lock = threading.Lock()
+step_writer = OrderedStepWriter(OCR_WORKERS, MAX_PENDING_CLICKS)
+ocr_pool = OcrPool(OCR_POOL_SIZE, tesseract_cmd=TESSERACT_CMD)
 
 # === BLIP LOADING ===
-device = "cuda" if torch.cuda.is_available() else "cpu"
-processor = BlipProcessor.from_pretrained("Salesforce/blip-image-captioning-base")
-model = BlipForConditionalGeneration.from_pretrained("Salesforce/blip-image-captioning-base").to(device)
+captioner = BlipCaptioner(batch_size=CAPTION_BATCH_SIZE, torch_threads=TORCH_THREADS)
+change_gate = ChangeGate()  # reuse captions for frames that did not change
 
 # === LOGGING UTIL ===
-def write_log_step(website, clicked=None, typed=None, screenshot_note=None):
+def append_log_step(logged_at, website, clicked=None, typed=None, screenshot_note=None):
     global step_counter
     with step_lock:
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        timestamp = logged_at.strftime("%Y-%m-%d %H:%M:%S")
         log_entry = f"\nStep {step_counter} @ {timestamp}\nWebsite Active: {website}"
         if clicked:
             log_entry += f"\nClicked on Button/Link: {clicked}"
@@ -56,6 +72,10 @@ def write_log_step(website, clicked=None, typed=None, screenshot_note=None):
         with open(LOG_PATH, "a", encoding='utf-8') as f:
             f.write(log_entry)
 
+def write_log_step(website, clicked=None, typed=None, screenshot_note=None):
+    # Written on the step writer thread, numbered in call order
+    step_writer.log(append_log_step, datetime.now(), website, clicked, typed, screenshot_note)
+
 # === UTILITIES ===
 def get_active_window_title():
     try:
@@ -65,26 +85,31 @@ def get_active_window_title():
         return "Unknown Window"
 
 def preprocess_image(img):
-    img = img.resize((img.width * 2, img.height * 2))
-    img = img.convert('L')
-    img = img.point(lambda x: 0 if x < 150 else 255, '1')
-    return img
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    gray = cv2.resize(gray, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
+    _, binary = cv2.threshold(gray, 149, 255, cv2.THRESH_BINARY)
+    return binary
 
-def get_text_near_click(x, y, radius=200):
-    screenshot = pyautogui.screenshot()
-    region = (max(0, x - radius), max(0, y - radius), min(screenshot.width, x + radius), min(screenshot.height, y + radius))
-    cropped = screenshot.crop(region)
+def grab_click_region(x, y, radius=200):
+    # Only the area around the click is captured (cheap enough for the input hook);
+    # copied out of the capture buffer because OCR runs later on another thread
+    return capture.grab_region(*capture.region_around(x, y, radius)).copy()
+
+def read_click_region(cropped, clicked_at=None):
     cropped = preprocess_image(cropped)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    timestamp = (clicked_at or datetime.now()).strftime("%Y%m%d_%H%M%S")
     img_path = os.path.join(SNAPSHOT_FOLDER, f"snap_{timestamp}.png")
-    cropped.save(img_path)
-    text = pytesseract.image_to_string(cropped).strip()
+    cv2.imwrite(img_path, cropped)
+    text = ocr_pool.read(cropped).strip()
     return text if text else "No readable text"
 
+def get_text_near_click(x, y, radius=200):
+    return read_click_region(grab_click_region(x, y, radius))
+
 def take_full_screenshot():
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filepath = os.path.join(SNAPSHOT_FOLDER, f"F10_screenshot_{timestamp}.png")
-    pyautogui.screenshot(filepath)
+    cv2.imwrite(filepath, capture.grab_full())
     print(f"Screenshot saved: {filepath}")
     write_log_step(get_active_window_title(), screenshot_note=f"Saved at {filepath}")
 
@@ -92,9 +117,13 @@ def take_full_screenshot():
 def user_activity_monitor():
     def on_click(x, y, button, pressed):
         if pressed:
+            # Runs on the OS input hook: capture and return, OCR happens on the pool
+            clicked_at = datetime.now()
             window_title = get_active_window_title()
-            detected_text = get_text_near_click(x, y)
-            write_log_step(window_title, clicked=detected_text)
+            region = grab_click_region(x, y)
+            step_writer.submit(lambda: read_click_region(region, clicked_at),
+                               partial(append_log_step, clicked_at, window_title),
+                               fallback="(OCR skipped, click queue full)", failed="(OCR failed)")
 
     def on_press(key):
         global typed_text_buffer, last_window, recording
@@ -137,47 +166,11 @@ def user_activity_monitor():
 
 # === SCREEN RECORDER THREAD ===
 def screen_record():
-    global recording
-    fourcc = cv2.VideoWriter_fourcc(*"XVID")
-    out = cv2.VideoWriter(VIDEO_PATH, fourcc, FPS, SCREEN_SIZE)
-    while recording:
-        img = pyautogui.screenshot()
-        frame = np.array(img)
-        frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-        out.write(frame)
-    out.release()
-
-# === VIDEO TO TEXT AFTER RECORDING ===
-def describe_frame(frame):
-    inputs = processor(frame, return_tensors="pt").to(device)
-    out = model.generate(**inputs)
-    caption = processor.decode(out[0], skip_special_tokens=True)
-    return caption
-
-def video_to_text(video_path, output_path, frame_interval):
-    cap = cv2.VideoCapture(video_path)
-    frame_count = 0
-    step_number = 1
-    log = []
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        if frame_count % frame_interval == 0:
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            try:
-                caption = describe_frame(frame_rgb)
-                timestamp = str(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-                log.append(f"Step {step_number} @ {timestamp}: {caption}")
-                print(f"[BLIP] {log[-1]}")
-                step_number += 1
-            except Exception as e:
-                print(f"[BLIP ERROR] Frame captioning failed: {e}")
-        frame_count += 1
-    cap.release()
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write("\n".join(log))
-    print(f"[BLIP SAVED] Captions written to {output_path}")
+    # Paced to FPS on the monotonic clock; missed slots repeat the last frame
+    recorder = PacedRecorder(capture, FPS, scale=RECORD_SCALE, crop=RECORD_CROP, overflow=RECORD_OVERFLOW,
+                             recording_format=RECORD_FORMAT)
+    recorder.record(VIDEO_PATH, lambda: recording)
+    print(f"[INFO] Recorder: {recorder.summary()}")
 
 # === MAIN LAUNCH ===
 def main():
@@ -192,9 +185,14 @@ def main():
 
     t1.join()
     t2.join()
+    step_writer.close()
+    print(f"[INFO] Step writer: {step_writer.summary()}")
+    ocr_pool.close()
+    print(f"[INFO] OCR: {ocr_pool.summary()}")
 
     print("[INFO] Processing video for BLIP captions...")
-    video_to_text(VIDEO_PATH, OUTPUT_TEXT, FRAME_INTERVAL)
+    caption_video(VIDEO_PATH, OUTPUT_TEXT, captioner, FRAME_INTERVAL, change_gate,
+                  workers=PREPROCESS_WORKERS, queue_size=PIPELINE_QUEUE_SIZE)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,347 @@
+import struct
+from datetime import datetime, timedelta
+from threading import Lock
+
+from activity_log_sink import ActivityLogSink
+
+# --------- Activity event log format ---------
+# A file starts with MAGIC and is followed by length-prefixed records:
+#
+#   [u8 type][u32 payload length][payload]
+#
+# Strings (window titles, key names, process names, ...) are interned: the
+# first time a string is written a STRING record assigns it an id, and every
+# later record refers to it by that u32 id. Lists of strings (keys, browsers,
+# top apps, ...) are interned the same way through LIST records, since they
+# barely change from one tick to the next. Readers skip record types they
+# do not know, so new record types can be added without breaking old logs.
+#
+# The tables are bounded: once a writer has interned max_interned strings
+# and lists, or written reset_bytes since the tables were last cleared, it
+# writes a RESET record and starts again from id 0. A long session (every
+# window title it ever saw) therefore costs neither the writer nor a
+# resuming reader more than one table's worth of memory.
+
+MAGIC = b"UAEVT1\n"
+
+REC_STRING = 1        # u32 id, utf-8 bytes
+REC_SCREEN_TICK = 2   # SCREEN_TICK, then u16-counted CLICKs
+REC_VISION_FRAME = 3  # i64 timestamp ms, u32 activity
+REC_LIST = 4          # u32 id, u32 string ids
+REC_PROCESS = 5       # i64 timestamp ms, u8 started, u32 pid, u32 name
+REC_VISION_SCHEDULED = 6  # REC_VISION_FRAME + u8 flags: models inferred (not carried) this frame
+REC_VISION_INTERVAL = 7   # run of frames in one state: i64 start ms, i64 end ms, u32 activity,
+                          # u32 frames, u32 face / u32 hand inferences
+REC_RESET = 8         # no payload: forget every string and list id so far
+
+HEADER = struct.Struct("<BI")
+# timestamp ms, window, music, battery, keys, browsers, documents, top apps, click count
+SCREEN_TICK = struct.Struct("<qIIIIIIIH")
+VISION_FRAME = struct.Struct("<qI")
+VISION_SCHEDULED = struct.Struct("<qIB")
+INFERRED_FLAGS = (("face", 1), ("hands", 2))
+VISION_INTERVAL = struct.Struct("<qqIIII")
+PROCESS = struct.Struct("<qBII")
+STRING_ID = struct.Struct("<I")
+CLICK = struct.Struct("<iiI")          # x, y, button
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_millis(ts):
+    return (ts - EPOCH) // timedelta(milliseconds=1)
+
+
+def from_millis(ms):
+    return EPOCH + timedelta(milliseconds=ms)
+
+
+def is_event_log(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+# --------- Writer ---------
+class EventWriter:
+    def __init__(self, path, batch_size=64, flush_interval=5.0, fsync_every=6,
+                 max_interned=4096, reset_bytes=4 << 20):
+        self._sink = ActivityLogSink(path, batch_size, flush_interval, fsync_every, header=MAGIC)
+        self._strings = {}
+        self._lists = {}
+        self.max_interned = max_interned
+        self.reset_bytes = reset_bytes
+        self._table_bytes = 0  # written since the tables were last cleared
+        self._lock = Lock()
+
+    def _begin(self):
+        # Output buffer for the next record(s), opened with a RESET when the tables are full
+        if (len(self._strings) + len(self._lists) >= self.max_interned
+                or self._table_bytes >= self.reset_bytes):
+            self._strings.clear()
+            self._lists.clear()
+            self._table_bytes = 0
+            return [HEADER.pack(REC_RESET, 0)]
+        return []
+
+    def _write(self, out):
+        data = b"".join(out)
+        self._table_bytes += len(data)
+        self._sink.write_bytes(data)
+
+    def _intern(self, text, out):
+        sid = self._strings.get(text)
+        if sid is None:
+            sid = self._strings[text] = len(self._strings)
+            data = text.encode("utf-8")
+            out.append(HEADER.pack(REC_STRING, STRING_ID.size + len(data)))
+            out.append(STRING_ID.pack(sid))
+            out.append(data)
+        return sid
+
+    def _intern_list(self, values, out):
+        key = tuple(str(v) for v in values)
+        lid = self._lists.get(key)
+        if lid is None:
+            ids = [self._intern(v, out) for v in key]
+            lid = self._lists[key] = len(self._lists)
+            out.append(HEADER.pack(REC_LIST, STRING_ID.size * (len(ids) + 1)))
+            out.append(struct.pack(f"<{len(ids) + 1}I", lid, *ids))
+        return lid
+
+    def screen_tick(self, timestamp, window, clicks, keys, browsers, documents, top_apps, music, battery):
+        with self._lock:
+            out = self._begin()
+            payload = [SCREEN_TICK.pack(
+                to_millis(timestamp), self._intern(window, out), self._intern(music, out),
+                self._intern(battery, out), self._intern_list(keys, out), self._intern_list(browsers, out),
+                self._intern_list(documents, out), self._intern_list(top_apps, out), len(clicks))]
+            for x, y, button in clicks:
+                payload.append(CLICK.pack(int(x), int(y), self._intern(str(button), out)))
+            body = b"".join(payload)
+            out.append(HEADER.pack(REC_SCREEN_TICK, len(body)))
+            out.append(body)
+            self._write(out)
+
+    def vision_frame(self, timestamp, activity, inferred=None):
+        # inferred: names of the models run on this frame (None = not scheduled, all ran)
+        with self._lock:
+            out = self._begin()
+            if inferred is None:
+                rtype = REC_VISION_FRAME
+                body = VISION_FRAME.pack(to_millis(timestamp), self._intern(activity, out))
+            else:
+                rtype = REC_VISION_SCHEDULED
+                flags = sum(bit for name, bit in INFERRED_FLAGS if name in inferred)
+                body = VISION_SCHEDULED.pack(to_millis(timestamp), self._intern(activity, out), flags)
+            out.append(HEADER.pack(rtype, len(body)))
+            out.append(body)
+            self._write(out)
+
+    def vision_interval(self, start, end, activity, frames, face_runs, hand_runs):
+        with self._lock:
+            out = self._begin()
+            body = VISION_INTERVAL.pack(to_millis(start), to_millis(end), self._intern(activity, out),
+                                        frames, face_runs, hand_runs)
+            out.append(HEADER.pack(REC_VISION_INTERVAL, len(body)))
+            out.append(body)
+            self._write(out)
+
+    def process_events(self, timestamp, events):
+        if not events:
+            return
+        with self._lock:
+            out = self._begin()
+            ts = to_millis(timestamp)
+            for event in events:
+                body = PROCESS.pack(ts, event.kind == "start", event.pid, self._intern(event.name, out))
+                out.append(HEADER.pack(REC_PROCESS, len(body)))
+                out.append(body)
+            self._write(out)
+
+    def flush(self):
+        self._sink.flush(fsync=True)
+
+    def close(self):
+        self._sink.close()
+
+
+# --------- Run-length vision log ---------
+# The webcam loops label ~10-30 frames a second and the label rarely
+# changes, so instead of one record per frame the vision log keeps the
+# current run open and writes one interval record when the state changes.
+# An interval runs from its first frame to the first frame of the next
+# state, so intervals tile the session; a gap longer than max_gap (camera
+# stalled, machine asleep) ends the run at its last frame instead. With
+# `heartbeat` set, a run is also written out every `heartbeat` seconds, so
+# live reports and crashes lose at most that much of the current state.
+class VisionIntervalLog:
+    def __init__(self, writer, heartbeat=30.0, max_gap=2.0):
+        self.writer = writer
+        self.heartbeat = timedelta(seconds=heartbeat) if heartbeat else None
+        self.max_gap = timedelta(seconds=max_gap)
+        self._run = None  # [start, last frame, activity, frames, face runs, hand runs]
+        self.frames = self.intervals = 0
+
+    def _emit(self, end):
+        start, _, activity, frames, face_runs, hand_runs = self._run
+        self.writer.vision_interval(start, end, activity, frames, face_runs, hand_runs)
+        self.intervals += 1
+        self._run = None
+
+    def vision_frame(self, timestamp, activity, inferred=None):
+        # inferred: names of the models run on this frame (None = not scheduled, all ran)
+        run = self._run
+        if run is not None:
+            if timestamp - run[1] > self.max_gap:
+                self._emit(run[1])
+            elif activity != run[2] or (self.heartbeat and timestamp - run[0] >= self.heartbeat):
+                self._emit(timestamp)
+        if self._run is None:
+            self._run = [timestamp, timestamp, activity, 0, 0, 0]
+        run = self._run
+        run[1] = timestamp
+        run[3] += 1
+        run[4] += inferred is None or "face" in inferred
+        run[5] += inferred is None or "hands" in inferred
+        self.frames += 1
+
+    def flush(self):
+        self.writer.flush()
+
+    def close(self):
+        if self._run is not None:
+            self._emit(self._run[1])
+        self.writer.close()
+
+    def summary(self):
+        return f"{self.frames} frames logged as {self.intervals} interval(s)"
+
+
+# --------- Reader ---------
+# A cursor remembers how far a log has been read plus the interned string
+# tables seen so far, so a later read can resume from the appended tail.
+# `tables` is where those tables start: the offset just past the last RESET.
+# Only the two offsets are saved; resume() rereads the tables from the log,
+# which is at most one writer reset_bytes' worth of records.
+class EventCursor:
+    def __init__(self, offset=0, strings=None, lists=None, tables=0):
+        self.offset = offset
+        self.strings = strings if strings is not None else []
+        self.lists = lists if lists is not None else []
+        self.tables = tables
+
+    def to_dict(self):
+        return {"offset": self.offset, "tables": self.tables}
+
+    @classmethod
+    def resume(cls, path, state):
+        cursor = cls(state.get("tables", 0), tables=state.get("tables", 0))
+        for _ in iter_records(path, cursor=cursor, end=state["offset"]):
+            pass
+        cursor.offset = max(cursor.offset, state["offset"])
+        return cursor
+
+
+# Records are decoded straight out of a fixed-size read buffer; consumers
+# must decode a yielded record before asking for the next one. By the time
+# a record is yielded, cursor.offset already points past it. Reading stops
+# at `end` (a record boundary) if given.
+def iter_records(path, chunk_size=1 << 20, cursor=None, end=None):
+    cursor = cursor or EventCursor()
+    strings, lists = cursor.strings, cursor.lists
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an activity event log")
+        base = max(cursor.offset, len(MAGIC))
+        f.seek(base)
+        data, pos = b"", 0
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break  # anything left in data is a truncated tail from a crash
+            base += pos
+            data = data[pos:] + chunk
+            pos, limit = 0, len(data)
+            while pos + HEADER.size <= limit:
+                if end is not None and base + pos >= end:
+                    return
+                rtype, length = HEADER.unpack_from(data, pos)
+                if pos + HEADER.size + length > limit:
+                    break
+                start = pos + HEADER.size
+                pos = start + length
+                cursor.offset = base + pos
+                if rtype == REC_STRING:
+                    strings.append(data[start + STRING_ID.size:pos].decode("utf-8"))
+                elif rtype == REC_LIST:
+                    ids = struct.unpack_from(f"<{length // STRING_ID.size}I", data, start)
+                    lists.append([strings[i] for i in ids[1:]])
+                elif rtype == REC_RESET:
+                    del strings[:], lists[:]
+                    cursor.tables = cursor.offset
+                else:
+                    yield rtype, data, start, strings, lists
+
+
+def decode_screen_tick(data, pos, strings, lists):
+    ts, window, music, battery, keys, browsers, documents, top_apps, n = SCREEN_TICK.unpack_from(data, pos)
+    pos += SCREEN_TICK.size
+    clicks = []
+    for _ in range(n):
+        x, y, button = CLICK.unpack_from(data, pos)
+        clicks.append((x, y, strings[button]))
+        pos += CLICK.size
+    return {
+        "timestamp": from_millis(ts),
+        "Active Window": strings[window],
+        "Mouse Clicks": clicks,
+        "Keys Pressed": lists[keys],
+        "Running Browsers": lists[browsers],
+        "Open Documents": lists[documents],
+        "Top Background Apps": lists[top_apps],
+        "Music Status": strings[music],
+        "Battery": strings[battery],
+    }
+
+
+def iter_screen_events(path, cursor=None):
+    for rtype, data, pos, strings, lists in iter_records(path, cursor=cursor):
+        if rtype == REC_SCREEN_TICK:
+            yield decode_screen_tick(data, pos, strings, lists)
+
+
+def read_screen_events(path):
+    return list(iter_screen_events(path))
+
+
+def read_process_events(path):
+    events = []
+    for rtype, data, pos, strings, _ in iter_records(path):
+        if rtype == REC_PROCESS:
+            ts, started, pid, name = PROCESS.unpack_from(data, pos)
+            events.append({"timestamp": from_millis(ts),
+                           "event": "start" if started else "exit", "pid": pid, "name": strings[name]})
+    return events
+
+
+def iter_vision_events(path, cursor=None):
+    for rtype, data, pos, strings, _ in iter_records(path, cursor=cursor):
+        if rtype == REC_VISION_FRAME:
+            ts, activity = VISION_FRAME.unpack_from(data, pos)
+            yield {"timestamp": from_millis(ts), "activity": strings[activity]}
+        elif rtype == REC_VISION_SCHEDULED:
+            ts, activity, flags = VISION_SCHEDULED.unpack_from(data, pos)
+            yield {"timestamp": from_millis(ts), "activity": strings[activity],
+                   "inferred": tuple(name for name, bit in INFERRED_FLAGS if flags & bit)}
+        elif rtype == REC_VISION_INTERVAL:
+            start, end, activity, frames, face_runs, hand_runs = VISION_INTERVAL.unpack_from(data, pos)
+            yield {"timestamp": from_millis(start), "end": from_millis(end),
+                   "activity": strings[activity], "frames": frames,
+                   "inferred": {"face": face_runs, "hands": hand_runs}}
+
+
+def read_vision_events(path):
+    return list(iter_vision_events(path))
@@ -0,0 +1,59 @@
+import os
+import time
+from threading import Lock
+
+# --------- Buffered, crash-safe log sink ---------
+# Encoded records are kept in a small in-memory batch and appended to disk
+# once the batch reaches `batch_size` records or `flush_interval` seconds
+# have passed. Every `fsync_every` flushes the file is also fsync'd, so a
+# crash loses at most one checkpoint window instead of the whole session.
+# `header` (bytes) is written first, e.g. the event log's MAGIC.
+
+
+class ActivityLogSink:
+    def __init__(self, path, batch_size=30, flush_interval=5.0, fsync_every=6, header=b""):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync_every = fsync_every
+        self._lock = Lock()
+        self._batch = []
+        self._flushes = 0
+        self._last_flush = time.monotonic()
+        self._file = open(path, "wb")
+        if header:
+            self._file.write(header)
+            self._sync()
+
+    def write_bytes(self, data):
+        with self._lock:
+            self._batch.append(data)
+            if len(self._batch) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def flush(self, fsync=False):
+        with self._lock:
+            self._flush_locked(force_sync=fsync)
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._flush_locked(force_sync=True)
+            self._file.close()
+
+    def _flush_locked(self, force_sync=False):
+        wrote = bool(self._batch)
+        if wrote:
+            self._file.write(b"".join(self._batch))
+            self._batch.clear()
+            self._flushes += 1
+        self._last_flush = time.monotonic()
+        if force_sync or (wrote and self.fsync_every and self._flushes % self.fsync_every == 0):
+            self._sync()
+        elif wrote:
+            self._file.flush()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
@@ -0,0 +1,152 @@
+import json
+import os
+import time
+from collections import deque, namedtuple
+from functools import lru_cache
+
+# --------- App classification rules ---------
+# Every rule tags a process name (or window title) with a (group, label)
+# pair when any of its keywords is a substring of the lower-cased name.
+# A rule without a label uses the matched name itself, which is how the
+# monitor reports running browsers.
+
+Rule = namedtuple("Rule", "group label keywords")
+
+DEFAULT_RULES = [
+    Rule("browser", None, ("chrome", "firefox", "msedge", "brave", "opera", "iexplore")),
+    Rule("document", "Word", ("winword",)),
+    Rule("document", "Excel", ("excel",)),
+    Rule("document", "PowerPoint", ("powerpnt",)),
+    Rule("document", "PDF Reader", ("acrord32", "foxit", "pdf")),
+    Rule("document", "Notepad", ("notepad",)),
+    Rule("document", "VSCode", ("code",)),
+    Rule("document", "Notepad++", ("notepad++",)),
+    Rule("music", None, ("spotify", "chrome")),
+]
+
+
+def load_rules(path):
+    # {"replace_defaults": false,
+    #  "rules": [{"group": "document", "label": "Teams", "keywords": ["teams"]}]}
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    rules = [] if config.get("replace_defaults") else list(DEFAULT_RULES)
+    for rule in config.get("rules", []):
+        keywords = tuple(k.lower() for k in rule["keywords"])
+        rules.append(Rule(rule["group"], rule.get("label"), keywords))
+    return rules
+
+
+# --------- Multi-pattern matcher (Aho-Corasick) ---------
+def _build_automaton(rules):
+    goto, fail, out = [{}], [0], [frozenset()]
+    for index, rule in enumerate(rules):
+        for keyword in rule.keywords:
+            node = 0
+            for ch in keyword:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    goto.append({})
+                    fail.append(0)
+                    out.append(frozenset())
+                    nxt = goto[node][ch] = len(goto) - 1
+                node = nxt
+            out[node] = out[node] | {index}
+
+    queue = deque(goto[0].values())
+    while queue:
+        node = queue.popleft()
+        for ch, nxt in goto[node].items():
+            queue.append(nxt)
+            f = fail[node]
+            while f and ch not in goto[f]:
+                f = fail[f]
+            fail[nxt] = goto[f].get(ch, 0)
+            out[nxt] = out[nxt] | out[fail[nxt]]
+    return goto, fail, out
+
+
+class AppClassifier:
+    def __init__(self, rules=DEFAULT_RULES, cache_size=4096):
+        self.rules = list(rules)
+        self._goto, self._fail, self._out = _build_automaton(self.rules)
+        self.classify = lru_cache(maxsize=cache_size)(self._classify)
+
+    def _match(self, text):
+        goto, fail, out = self._goto, self._fail, self._out
+        node, hits = 0, set()
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                hits |= out[node]
+        return hits
+
+    def _classify(self, name):
+        hits = self._match(name.lower())
+        return tuple((self.rules[i].group, self.rules[i].label or name) for i in sorted(hits))
+
+    def labels(self, names, group):
+        found = {}
+        for name in names:
+            for tag_group, label in self.classify(name):
+                if tag_group == group:
+                    found[label] = None
+        return list(found)
+
+    def category(self, name):
+        # Display name for reports: the rule label, or the group for unlabeled rules
+        for group, label in self.classify(name):
+            return group if label == name else label
+        return None
+
+
+def load_classifier(rules_path=None, cache_size=4096):
+    if rules_path and os.path.exists(rules_path):
+        return AppClassifier(load_rules(rules_path), cache_size)
+    return AppClassifier(cache_size=cache_size)
+
+
+# --------- Benchmark: per-tick classification cost ---------
+def _legacy_tick(process_list):
+    browsers = ['chrome', 'firefox', 'msedge', 'brave', 'opera', 'iexplore']
+    running = list(set([p for p in process_list if any(b in p.lower() for b in browsers)]))
+    doc_types = {
+        'Word': ['winword'], 'Excel': ['excel'], 'PowerPoint': ['powerpnt'],
+        'PDF Reader': ['acrord32', 'foxit', 'pdf'], 'Notepad': ['notepad'],
+        'VSCode': ['code'], 'Notepad++': ['notepad++']
+    }
+    docs = [name for name, keywords in doc_types.items()
+            if any(any(k in proc.lower() for k in keywords) for proc in process_list)]
+    music = any("spotify" in p.lower() or "chrome" in p.lower() for p in process_list)
+    return running, docs, music
+
+
+def benchmark(process_count=1500, ticks=200):
+    base = ["svchost.exe", "chrome.exe", "explorer.exe", "RuntimeBroker.exe", "Code.exe",
+            "WINWORD.EXE", "python.exe", "conhost.exe", "Spotify.exe", "msedge.exe"]
+    names = [f"{base[i % len(base)][:-4]}_{i}.exe" if i % 3 else base[i % len(base)]
+             for i in range(process_count)]
+    classifier = AppClassifier()
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        _legacy_tick(names)
+    legacy = (time.perf_counter() - start) / ticks
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        classifier.labels(names, "browser")
+        classifier.labels(names, "document")
+        classifier.labels(names, "music")
+    compiled = (time.perf_counter() - start) / ticks
+
+    print(f"{process_count} processes, {ticks} ticks")
+    print(f" - keyword loops : {legacy * 1000:.3f} ms/tick")
+    print(f" - compiled + LRU: {compiled * 1000:.3f} ms/tick ({legacy / compiled:.1f}x)")
+    print(f" - cache: {classifier.classify.cache_info()}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,180 @@
+import argparse
+import time
+from concurrent.futures import Future
+from datetime import datetime
+
+import cv2
+import torch
+from transformers import BlipProcessor, BlipForConditionalGeneration
+
+from frame_change import ChangeGate
+from frame_sampler import FrameSampler, every_n_frames
+from tile_recording import open_recording
+from video_pipeline import VideoPipeline
+
+# === BATCHED BLIP CAPTIONING ===
+# Frames are captioned in batches: one processor call and one generate()
+# per batch, so CPU matrix multiplies run on full batches instead of
+# single images.
+
+MODEL_NAME = "Salesforce/blip-image-captioning-base"
+
+
+class BlipCaptioner:
+    def __init__(self, model_name=MODEL_NAME, device=None, batch_size=8, torch_threads=None):
+        if torch_threads:
+            torch.set_num_threads(torch_threads)
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.batch_size = batch_size
+        self.processor = BlipProcessor.from_pretrained(model_name)
+        self.model = BlipForConditionalGeneration.from_pretrained(model_name).to(self.device)
+        self.model.eval()
+
+    def describe_frames(self, frames):
+        captions = []
+        for start in range(0, len(frames), self.batch_size):
+            batch = frames[start:start + self.batch_size]
+            inputs = self.processor(images=batch, return_tensors="pt").to(self.device)
+            with torch.inference_mode():
+                out = self.model.generate(**inputs)
+            captions.extend(self.processor.batch_decode(out, skip_special_tokens=True))
+        return captions
+
+    def describe_frame(self, frame):
+        return self.describe_frames([frame])[0]
+
+
+# === CAPTIONING A RECORDING ===
+# caption_video() turns a recording into numbered "Step N @ time: caption"
+# lines through a VideoPipeline:
+#   decode + change gate -> BGR->RGB (worker pool) -> batched BLIP -> writer
+# A sampled frame that needs a caption gets a Future stored in the gate, so
+# later identical frames reuse it even while it is still being generated.
+# A reusing frame keeps its own (BGR) frame in case that caption fails; the
+# writer runs in frame order, when every reused caption is resolved, and
+# captions such a frame itself. A failed batch is retried one frame at a
+# time, so one bad frame only loses its own step.
+
+def _sampled_frames(sampler, gate):
+    # item: (frame index, frame, caption Future, computed here?)
+    for frame_count, _, frame in sampler:
+        frame_hash, thumb, caption = gate.key(frame)
+        if caption is None:
+            caption = Future()
+            gate.store(frame_hash, thumb, caption)
+            yield frame_count, frame, caption, True
+        else:
+            yield frame_count, frame, caption, False
+
+
+def _to_rgb(item):
+    frame_count, frame, caption, computed = item
+    if computed:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    return frame_count, frame, caption, computed
+
+
+def _caption_frame(captioner, frame_count, frame, caption, log_prefix):
+    # Caption one RGB frame into the `caption` Future
+    try:
+        caption.set_result(captioner.describe_frame(frame))
+    except Exception as e:
+        print(f"{log_prefix} Captioning frame {frame_count} failed: {e}")
+        caption.set_exception(e)
+    return caption
+
+
+def caption_video(video_path, output_path, captioner, frame_interval=30, gate=None,
+                  workers=2, queue_size=16, log_prefix="[BLIP]"):
+    gate = gate if gate is not None else ChangeGate()
+    retried = {}  # failed caption -> caption redone for the frames that reused it
+    log = []
+
+    def caption_frames(items):
+        todo = [(frame_count, frame, caption) for frame_count, frame, caption, computed in items if computed]
+        if todo:
+            try:
+                captions = captioner.describe_frames([frame for _, frame, _ in todo])
+            except Exception as e:
+                print(f"{log_prefix} Captioning frames {items[0][0]}-{items[-1][0]} failed: {e}; "
+                      f"retrying one by one")
+                for frame_count, frame, caption in todo:
+                    _caption_frame(captioner, frame_count, frame, caption, log_prefix)
+            else:
+                for (_, _, caption), text in zip(todo, captions):
+                    caption.set_result(text)
+        return [(frame_count, caption, None if computed else frame)
+                for frame_count, frame, caption, computed in items]
+
+    def write_step(item):
+        frame_count, caption, frame = item
+        if caption.exception() is not None and frame is not None:
+            if caption not in retried:
+                retried[caption] = _caption_frame(captioner, frame_count, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB),
+                                                  Future(), log_prefix)
+            caption = retried[caption]
+        if caption.exception() is not None:
+            return  # reported when its captioning failed
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        log.append(f"Step {len(log) + 1} @ {timestamp}: {caption.result()}")
+        print(f"{log_prefix} {log[-1]}")
+
+    cap = open_recording(video_path)  # .avi or tile recording
+    sampler = FrameSampler(cap, every_n_frames(frame_interval), video_path)
+    pipeline = VideoPipeline(_to_rgb, caption_frames, write_step, workers=workers,
+                             queue_size=queue_size, batch_size=captioner.batch_size)
+    try:
+        pipeline.run(_sampled_frames(sampler, gate))
+    finally:
+        cap.release()
+    print(f"{log_prefix} Sampler: {sampler.summary()}")
+    print(f"{log_prefix} Scene-change gate: {gate.summary()}")
+    print(pipeline.summary())
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(log))
+    print(f"{log_prefix} Steps written to {output_path}")
+    return log
+
+
+# === BENCHMARK: frames/sec per batch size ===
+def sample_frames(video_path, count, frame_interval):
+    cap = cv2.VideoCapture(video_path)
+    frames, frame_count = [], 0
+    while cap.isOpened() and len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if frame_count % frame_interval == 0:
+            frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        frame_count += 1
+    cap.release()
+    return frames
+
+
+def benchmark(video_path, batch_sizes, count=32, frame_interval=30, torch_threads=None):
+    frames = sample_frames(video_path, count, frame_interval)
+    if not frames:
+        print(f"[ERROR] No frames could be read from {video_path}")
+        return
+    captioner = BlipCaptioner(torch_threads=torch_threads)
+    print(f"[BENCH] {len(frames)} frames on {captioner.device}, torch threads: {torch.get_num_threads()}")
+    captioner.batch_size = 1
+    captioner.describe_frames(frames[:1])  # warm-up
+    for batch_size in batch_sizes:
+        captioner.batch_size = batch_size
+        start = time.perf_counter()
+        captioner.describe_frames(frames)
+        elapsed = time.perf_counter() - start
+        print(f"[BENCH] batch size {batch_size:>3}: {len(frames) / elapsed:6.2f} frames/sec")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batched BLIP captioning.")
+    parser.add_argument("video", help="recording to sample frames from")
+    parser.add_argument("--batch-sizes", default="1,2,4,8,16")
+    parser.add_argument("--frames", type=int, default=32)
+    parser.add_argument("--frame-interval", type=int, default=30)
+    parser.add_argument("--threads", type=int, help="torch intra-op threads")
+    args = parser.parse_args()
+    benchmark(args.video, [int(b) for b in args.batch_sizes.split(",")], args.frames, args.frame_interval, args.threads)
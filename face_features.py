@@ -0,0 +1,174 @@
+import argparse
+import glob
+import os
+import time
+from itertools import chain
+
+import numpy as np
+
+from activity_events import to_millis
+
+# === FACE LANDMARK FEATURES ===
+# A FaceMesh face is converted once into an (N, 3) float32 array of
+# normalized (x, y, z) points (N = 468, or 478 with refine_landmarks=True,
+# which adds the irises). The feature functions take (..., N, 3), so the
+# same code scores one live face or a whole archive of frames at once.
+#
+#   eye_aspect_ratio  (..., 2)  left/right eye openness, ~0.3 open, <0.2 closed
+#   head_pose         (..., 2)  yaw, pitch in degrees; yaw > 0 = face turned
+#                               toward image left, pitch > 0 = chin up
+#   gaze_offset       (..., 2)  iris offset from the eye centre (x, y), in
+#                               eye widths; NaN without iris landmarks
+#
+# LandmarkArchive appends per-frame landmarks to a directory of .npy
+# segments so gaze and attention metrics can be recomputed offline
+# without re-recording.
+
+# MediaPipe FaceMesh indices (subject's left/right)
+LEFT_EYE = (362, 385, 387, 263, 373, 380)    # corner, top, top, corner, bottom, bottom
+RIGHT_EYE = (33, 160, 158, 133, 153, 144)
+LEFT_IRIS, RIGHT_IRIS = 473, 468              # iris centres (refined mesh only)
+NOSE_TIP, FOREHEAD, CHIN = 1, 10, 152
+RIGHT_CHEEK, LEFT_CHEEK = 234, 454
+IRIS_LANDMARKS = 478
+
+EAR_CLOSED = 0.2       # eye aspect ratio below which an eye counts as closed
+YAW_LOOK_AWAY = 20.0   # degrees of head yaw before the user counts as looking away
+
+
+def landmarks_array(face_landmarks):
+    # FaceMesh NormalizedLandmarkList -> (N, 3) float32
+    points = face_landmarks.landmark
+    flat = np.fromiter(chain.from_iterable((p.x, p.y, p.z) for p in points), np.float32, len(points) * 3)
+    return flat.reshape(-1, 3)
+
+
+def _distance(points, a, b):
+    return np.linalg.norm(points[..., a, :2] - points[..., b, :2], axis=-1)
+
+
+def eye_aspect_ratio(points):
+    ears = []
+    for p1, p2, p3, p4, p5, p6 in (LEFT_EYE, RIGHT_EYE):
+        vertical = _distance(points, p2, p6) + _distance(points, p3, p5)
+        ears.append(vertical / (2.0 * np.maximum(_distance(points, p1, p4), 1e-6)))
+    return np.stack(ears, axis=-1)
+
+
+def head_pose(points):
+    # Yaw from how far the nose sits off the cheek midline, pitch from the
+    # depth difference between chin and forehead (z shares x's scale).
+    right, left = points[..., RIGHT_CHEEK, :], points[..., LEFT_CHEEK, :]
+    half_width = np.maximum(np.abs(left[..., 0] - right[..., 0]) / 2.0, 1e-6)
+    offset = ((right[..., 0] + left[..., 0]) / 2.0 - points[..., NOSE_TIP, 0]) / half_width
+    yaw = np.degrees(np.arcsin(np.clip(offset, -1.0, 1.0)))
+    chin, forehead = points[..., CHIN, :], points[..., FOREHEAD, :]
+    pitch = np.degrees(np.arctan2(forehead[..., 2] - chin[..., 2], chin[..., 1] - forehead[..., 1]))
+    return np.stack((yaw, pitch), axis=-1)
+
+
+def gaze_offset(points):
+    if points.shape[-2] < IRIS_LANDMARKS:
+        return np.full(points.shape[:-2] + (2,), np.nan, np.float32)
+    offsets = []
+    for iris, eye in ((LEFT_IRIS, LEFT_EYE), (RIGHT_IRIS, RIGHT_EYE)):
+        inner, outer = eye[0], eye[3]
+        centre = (points[..., inner, :2] + points[..., outer, :2]) / 2.0
+        width = np.maximum(_distance(points, inner, outer), 1e-6)
+        offsets.append((points[..., iris, :2] - centre) / width[..., None])
+    return (offsets[0] + offsets[1]) / 2.0
+
+
+def looking_direction(yaw):
+    # Same labels as the old nose-position check (nose toward image left = "right")
+    if yaw > YAW_LOOK_AWAY:
+        return "Looking right"
+    if yaw < -YAW_LOOK_AWAY:
+        return "Looking left"
+    return "Looking at screen"
+
+
+# === LANDMARK ARCHIVE ===
+# <directory>/landmarks_000000.npy  (frames, N, 3) float32
+# <directory>/times_000000.npy      (frames,) int64 ms (activity_events.to_millis)
+# Frames are buffered into a preallocated chunk and written as a new
+# segment pair when it fills (and on close); existing segments are never
+# rewritten, and a reopened archive continues the numbering.
+
+class LandmarkArchive:
+    def __init__(self, directory, chunk_frames=1800):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.chunk_frames = chunk_frames
+        self.segment = len(glob.glob(os.path.join(directory, "landmarks_*.npy")))
+        self._points = self._times = None
+        self._count = 0
+        self.frames = 0
+
+    def append(self, timestamp, points):
+        if self._points is None:
+            self._points = np.empty((self.chunk_frames,) + points.shape, np.float32)
+            self._times = np.empty(self.chunk_frames, np.int64)
+        self._points[self._count] = points
+        self._times[self._count] = to_millis(timestamp)
+        self._count += 1
+        self.frames += 1
+        if self._count == self.chunk_frames:
+            self.flush()
+
+    def _save(self, name, array):
+        path = os.path.join(self.directory, f"{name}_{self.segment:06d}.npy")
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, array)
+        os.replace(path + ".tmp", path)
+
+    def flush(self):
+        if not self._count:
+            return
+        # times first: a landmarks segment only exists once its times do
+        self._save("times", self._times[:self._count])
+        self._save("landmarks", self._points[:self._count])
+        self.segment += 1
+        self._count = 0
+
+    def close(self):
+        self.flush()
+
+
+def iter_archive(directory, mmap=True):
+    # (times, points) per segment; mmap=True maps segments instead of reading them
+    for path in sorted(glob.glob(os.path.join(directory, "landmarks_*.npy"))):
+        folder, name = os.path.split(path)
+        times = np.load(os.path.join(folder, name.replace("landmarks_", "times_")))
+        yield times, np.load(path, mmap_mode="r" if mmap else None)
+
+
+def read_archive(directory):
+    segments = list(iter_archive(directory, mmap=False))
+    if not segments:
+        return np.empty(0, np.int64), np.empty((0, 0, 3), np.float32)
+    return np.concatenate([t for t, _ in segments]), np.concatenate([p for _, p in segments])
+
+
+# === OFFLINE SUMMARY: recompute features over an archive ===
+def summarize(directory):
+    frames, closed, away = 0, 0, 0
+    start = time.perf_counter()
+    for times, points in iter_archive(directory):
+        points = np.asarray(points)
+        frames += len(points)
+        closed += int((eye_aspect_ratio(points).mean(axis=-1) < EAR_CLOSED).sum())
+        away += int((np.abs(head_pose(points)[:, 0]) > YAW_LOOK_AWAY).sum())
+    elapsed = time.perf_counter() - start
+    if not frames:
+        print(f"[ARCHIVE] no landmark segments in {directory}")
+        return
+    print(f"[ARCHIVE] {frames} frames scored in {elapsed * 1000:.1f} ms ({frames / elapsed:,.0f} frames/s)")
+    print(f"[ARCHIVE] eyes closed {closed / frames * 100:.1f}%, looking away {away / frames * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute eye and head-pose metrics from a landmark archive.")
+    parser.add_argument("directory")
+    args = parser.parse_args()
+    summarize(args.directory)
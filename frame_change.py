@@ -0,0 +1,97 @@
+import cv2
+import numpy as np
+from collections import OrderedDict
+
+# === SCENE-CHANGE GATE + RESULT CACHE ===
+# Screen recordings are mostly static, so expensive per-frame work (BLIP
+# captions, OCR) is only redone when a frame really changed. Each frame is
+# reduced to a small grayscale thumbnail and a 64-bit difference hash:
+#  - a frame is "unchanged" when its hash is close to the previously processed
+#    frame and no thumbnail pixel moved by more than `pixel_threshold` (small
+#    edits such as a typed word still change a few thumbnail pixels), and it
+#    reuses that frame's result;
+#  - otherwise its hash is looked up in an LRU cache of earlier results, so
+#    switching back to a screen seen before is also free.
+# Near-identical screens share a hash, so each hash keeps a few cached
+# (thumbnail, result) variants and the pixel check picks the right one.
+
+
+def thumbnail(frame, size=64):
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, (size, size), interpolation=cv2.INTER_AREA)
+
+
+def difference_hash(thumb, hash_size=8):
+    small = cv2.resize(thumb, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def changed_pixels(a, b, threshold):
+    return int(np.count_nonzero(cv2.absdiff(a, b) > threshold))
+
+
+class ChangeGate:
+    VARIANTS_PER_HASH = 4
+
+    def __init__(self, max_hash_distance=2, pixel_threshold=12, max_changed_pixels=0, cache_size=512):
+        self.max_hash_distance = max_hash_distance
+        self.pixel_threshold = pixel_threshold
+        self.max_changed_pixels = max_changed_pixels
+        self.cache_size = cache_size
+        self._cache = OrderedDict()   # hash -> [(thumbnail, result), ...]
+        self._last = None             # (hash, thumbnail) of the last processed frame
+        self.frames = self.computed = self.reused = 0
+
+    def _same_pixels(self, thumb_a, thumb_b):
+        return changed_pixels(thumb_a, thumb_b, self.pixel_threshold) <= self.max_changed_pixels
+
+    def _same(self, hash_a, thumb_a, hash_b, thumb_b):
+        return bin(hash_a ^ hash_b).count("1") <= self.max_hash_distance and self._same_pixels(thumb_a, thumb_b)
+
+    def key(self, frame):
+        # Returns (hash, thumbnail, cached result or None)
+        self.frames += 1
+        thumb = thumbnail(frame)
+        frame_hash = difference_hash(thumb)
+        if self._last is not None and self._same(frame_hash, thumb, *self._last):
+            frame_hash, thumb = self._last
+        self._last = (frame_hash, thumb)
+        result = self._find(frame_hash, thumb)
+        if result is not None:
+            self._cache.move_to_end(frame_hash)
+            self.reused += 1
+        return frame_hash, thumb, result
+
+    def _find(self, frame_hash, thumb):
+        for cached_thumb, result in self._cache.get(frame_hash, ()):
+            if self._same_pixels(cached_thumb, thumb):
+                return result
+        return None
+
+    def store(self, frame_hash, thumb, result):
+        self.computed += 1
+        variants = self._cache.setdefault(frame_hash, [])
+        variants.insert(0, (thumb, result))
+        del variants[self.VARIANTS_PER_HASH:]
+        self._cache.move_to_end(frame_hash)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def mark_reused(self):
+        # For callers that batch work: a frame matched a result still being computed
+        self.reused += 1
+
+    def lookup(self, frame_hash, thumb):
+        return self._find(frame_hash, thumb)
+
+    def process(self, frame, compute):
+        frame_hash, thumb, result = self.key(frame)
+        if result is None:
+            result = compute(frame)
+            self.store(frame_hash, thumb, result)
+        return result
+
+    def summary(self):
+        saved = self.reused / self.frames * 100 if self.frames else 0.0
+        return f"{self.frames} frames, {self.computed} computed, {self.reused} reused ({saved:.0f}% skipped)"
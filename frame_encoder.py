@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+# === BACKGROUND VIDEO ENCODER ===
+# Drop-in for cv2.VideoWriter (write / release) that encodes on its own
+# thread, so capture and inference loops never wait on the codec.
+# VideoWriter.write releases the GIL, so a thread is enough.
+# write() copies the frame into one of `slots` preallocated buffers and
+# returns; when every buffer is waiting to be encoded the overflow policy
+# decides:
+#   block        wait for the encoder (nothing lost, capture slows down)
+#   drop_oldest  overwrite the oldest queued frame (keeps the video current)
+#   drop_newest  discard the incoming frame
+# Frames whose size differs from frame_size are resized into the buffer.
+# Pass `writer` (anything with write/release, e.g. a TileWriter) to encode
+# something other than a VideoWriter file.
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "drop_newest")
+
+
+class FrameEncoder:
+    DROP_REPORT_INTERVAL = 10.0  # seconds between dropped-frame log lines
+
+    def __init__(self, path, fps, frame_size, fourcc="XVID", slots=8, overflow="drop_oldest", name="ENCODER",
+                 writer=None):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}, got {overflow!r}")
+        self.path = path
+        self.frame_size = tuple(frame_size)
+        self.overflow = overflow
+        self.name = name
+        self._writer = writer or cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, self.frame_size)
+        width, height = self.frame_size
+        self._buffers = [np.empty((height, width, 3), np.uint8) for _ in range(slots)]
+        self._free = deque(range(slots))
+        self._queued = deque()
+        self._cond = threading.Condition()
+        self._closing = False
+        self.accepted = self.encoded = self.dropped = self.peak_queued = 0
+        self.encode_time = self.worst_encode = 0.0
+        self._reported_drops = 0
+        self._last_report = time.monotonic()
+        self._thread = threading.Thread(target=self._encode_loop, daemon=True)
+        self._thread.start()
+
+    def write(self, frame):
+        with self._cond:
+            if not self._free:
+                if self.overflow == "drop_newest":
+                    self.dropped += 1
+                    return False
+                if self.overflow == "drop_oldest" and self._queued:
+                    self._free.append(self._queued.popleft())
+                    self.dropped += 1
+                while not self._free:
+                    self._cond.wait()
+            index = self._free.popleft()
+
+        buf = self._buffers[index]  # owned by this call until queued
+        if frame.shape == buf.shape:
+            np.copyto(buf, frame)
+        else:
+            cv2.resize(frame, self.frame_size, dst=buf, interpolation=cv2.INTER_AREA)
+
+        with self._cond:
+            self._queued.append(index)
+            self.accepted += 1
+            self.peak_queued = max(self.peak_queued, len(self._queued))
+            self._cond.notify_all()
+        return True
+
+    def _encode_loop(self):
+        while True:
+            with self._cond:
+                while not self._queued and not self._closing:
+                    self._cond.wait()
+                if not self._queued:
+                    break
+                index = self._queued.popleft()
+
+            start = time.perf_counter()
+            self._writer.write(self._buffers[index])
+            elapsed = time.perf_counter() - start
+
+            with self._cond:
+                self._free.append(index)
+                self.encoded += 1
+                self.encode_time += elapsed
+                self.worst_encode = max(self.worst_encode, elapsed)
+                self._cond.notify_all()
+            self._report_drops()
+
+    def _report_drops(self, force=False):
+        now = time.monotonic()
+        if self.dropped != self._reported_drops and (force or now - self._last_report >= self.DROP_REPORT_INTERVAL):
+            print(f"[{self.name}] {self.dropped - self._reported_drops} frame(s) dropped ({self.overflow}), "
+                  f"{self.dropped} total")
+            self._reported_drops = self.dropped
+            self._last_report = now
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._queued)
+
+    def release(self):
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._writer.release()
+        self._report_drops(force=True)
+
+    def summary(self):
+        average = self.encode_time / self.encoded * 1000 if self.encoded else 0.0
+        return (f"{self.encoded} frames encoded, {self.dropped} dropped ({self.overflow}), "
+                f"peak queue {self.peak_queued}/{len(self._buffers)}, "
+                f"encode avg {average:.1f} ms, max {self.worst_encode * 1000:.1f} ms")
@@ -0,0 +1,126 @@
+import cv2
+from collections import namedtuple
+
+# === FRAME SAMPLER ===
+# Yields only the frames a sampling policy asks for. Skipped frames are
+# advanced with grab() (demux/decode, but no colour conversion or copy) and
+# only sampled frames are retrieve()d. When the gap to the next sample is
+# long and the container supports it, the sampler seeks by timestamp
+# instead of grabbing through the gap.
+#
+# Policies:
+#   every_n_frames(n)   - frame 0, n, 2n, ... (the old `frame_count % n == 0`)
+#   per_second(rate)    - `rate` samples per second of video
+#   keyframes_only()    - only the stream's keyframes (needs an FFmpeg build
+#                         that reports key frames; otherwise 1 sample/sec)
+
+SamplingPolicy = namedtuple("SamplingPolicy", "kind value")
+
+
+def every_n_frames(n):
+    return SamplingPolicy("interval", max(1, int(n)))
+
+
+def per_second(rate=1.0):
+    return SamplingPolicy("rate", float(rate))
+
+
+def keyframes_only():
+    return SamplingPolicy("keyframes", None)
+
+
+def keyframe_indexes(video_path):
+    # Reads packets without decoding: with CAP_PROP_FORMAT = -1 the FFmpeg
+    # backend returns raw packets and flags the ones holding a key frame.
+    if not hasattr(cv2, "CAP_PROP_LRF_HAS_KEY_FRAME"):
+        return None
+    cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG)
+    if not cap.isOpened() or not cap.set(cv2.CAP_PROP_FORMAT, -1):
+        cap.release()
+        return None
+    indexes, index = [], 0
+    while cap.grab():
+        if cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+            indexes.append(index)
+        index += 1
+    cap.release()
+    return indexes or None
+
+
+class FrameSampler:
+    def __init__(self, cap, policy, video_path=None, seek_after=None, start_frame=0, end_frame=None):
+        self.cap = cap
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        # Seeking lands on the previous keyframe and decodes forward, so it
+        # only pays off for gaps longer than a typical GOP (~2 seconds).
+        self.seek_after = seek_after if seek_after is not None else int(self.fps * 2)
+        self.can_seek = cap.get(cv2.CAP_PROP_FRAME_COUNT) > 0
+        self.targets = None
+        self.step = 1
+        self.grabbed = self.retrieved = self.seeks = 0
+
+        if policy.kind == "keyframes":
+            if hasattr(cap, "keyframe_indexes"):  # tile recordings index their own keyframes
+                self.targets = cap.keyframe_indexes() or None
+            else:
+                self.targets = keyframe_indexes(video_path) if video_path else None
+            if self.targets is None:
+                print("[SAMPLER] Key frame flags unavailable; sampling 1 frame per second instead")
+                policy = per_second(1)
+        if policy.kind == "interval":
+            self.step = policy.value
+        elif policy.kind == "rate":
+            self.step = max(1, int(self.fps / policy.value))
+
+    def _next_targets(self):
+        if self.targets is not None:
+            for index in self.targets:
+                if index >= self.start_frame:
+                    yield index
+            return
+        index = -(-self.start_frame // self.step) * self.step  # first multiple of step >= start
+        while True:
+            yield index
+            index += self.step
+
+    def _seek(self, target):
+        if not self.cap.set(cv2.CAP_PROP_POS_MSEC, target / self.fps * 1000.0):
+            return None
+        self.seeks += 1
+        landed = int(round(self.cap.get(cv2.CAP_PROP_POS_FRAMES)))
+        if landed > target:
+            # Container can't seek accurately; rewind and stop seeking
+            self.can_seek = False
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            return 0
+        return landed
+
+    def __iter__(self):
+        position = 0
+        if self.start_frame and self.can_seek:
+            position = self._seek(self.start_frame) or 0
+        for target in self._next_targets():
+            if self.end_frame is not None and target >= self.end_frame:
+                return
+            if self.can_seek and target - position > self.seek_after:
+                landed = self._seek(target)
+                if landed is not None:
+                    position = landed
+            while position < target:
+                if not self.cap.grab():
+                    return
+                self.grabbed += 1
+                position += 1
+            if not self.cap.grab():
+                return
+            ret, frame = self.cap.retrieve()
+            position += 1
+            if not ret:
+                return
+            self.retrieved += 1
+            yield target, target / self.fps, frame
+
+    def summary(self):
+        return f"{self.retrieved} frames decoded, {self.grabbed} skipped via grab(), {self.seeks} seek(s)"
@@ -0,0 +1,32 @@
+from collections import deque
+
+# === LATENCY ACCUMULATOR ===
+# Running count / mean / max of per-call timings in seconds, plus
+# percentiles over the most recent `window` samples (window=None keeps
+# every sample, for benchmarks). Shared by the recorder, the OCR pool and
+# the vision replay benchmark.
+
+
+class LatencyStats:
+    def __init__(self, window=1000):
+        self.count = 0
+        self.total = self.worst = 0.0
+        self.recent = deque(maxlen=window)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.worst = max(self.worst, seconds)
+        self.recent.append(seconds)
+
+    def percentiles(self, *qs):
+        # over the most recent `window` samples (window=None keeps them all)
+        ordered = sorted(self.recent)
+        return [ordered[min(len(ordered) - 1, int(len(ordered) * q))] for q in qs]
+
+    def line(self):
+        if not self.count:
+            return "n/a"
+        p95, = self.percentiles(0.95)
+        return (f"avg {self.total / self.count * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms, "
+                f"max {self.worst * 1000:.1f} ms")
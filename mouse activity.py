@@ -1,17 +1,24 @@
 from pynput import mouse, keyboard
 import pygetwindow as gw
-import pyautogui
-import pytesseract
+import cv2
 from datetime import datetime
+from functools import partial
 import threading
 import os
 import time
-from PIL import Image
+from ocr_engine import OcrPool
+from screen_capture import open_capture
+from step_writer import OrderedStepWriter
 
 # ----------- Configuration ------------
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+TESSERACT_CMD = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 LOG_PATH = "D:/user_activity_log.txt"
 SNAPSHOT_FOLDER = "D:/button_snapshots"
+OCR_WORKERS = 2          # threads running Tesseract for clicks
+MAX_PENDING_CLICKS = 32  # clicks waiting for OCR before new clicks skip it
+OCR_POOL_SIZE = OCR_WORKERS  # long-lived Tesseract engines (in-process when tesserocr is installed);
+                             # more than one runs each single-threaded (OMP_THREAD_LIMIT=1)
+CAPTURE_BACKEND = "auto"  # "mss", "pyautogui" or "synthetic" (headless testing)
 os.makedirs(SNAPSHOT_FOLDER, exist_ok=True)
 
 # ----------- Global Variables ------------
@@ -20,12 +27,15 @@ last_window = None
 step_counter = 1
 step_lock = threading.Lock()
 stop_flag = threading.Event()
+step_writer = OrderedStepWriter(OCR_WORKERS, MAX_PENDING_CLICKS)
+capture = open_capture(CAPTURE_BACKEND)
+ocr_pool = OcrPool(OCR_POOL_SIZE, tesseract_cmd=TESSERACT_CMD)
 
 # ----------- Utility Functions ------------
-def write_log_step(website, clicked=None, typed=None, screenshot_note=None):
+def append_log_step(logged_at, website, clicked=None, typed=None, screenshot_note=None):
     global step_counter
     with step_lock:
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        timestamp = logged_at.strftime("%Y-%m-%d %H:%M:%S")
         log_entry = f"\nStep {step_counter} @ {timestamp}\nWebsite Active: {website}"
         if clicked:
             log_entry += f"\nClicked on Button/Link: {clicked}"
@@ -40,6 +50,10 @@ def write_log_step(website, clicked=None, typed=None, screenshot_note=None):
         with open(LOG_PATH, "a", encoding='utf-8') as f:
             f.write(log_entry)
 
+def write_log_step(website, clicked=None, typed=None, screenshot_note=None):
+    # Written on the step writer thread, numbered in call order
+    step_writer.log(append_log_step, datetime.now(), website, clicked, typed, screenshot_note)
+
 def get_active_window_title():
     try:
         win = gw.getActiveWindow()
@@ -48,45 +62,52 @@ def get_active_window_title():
         return "Unknown Window"
 
 def preprocess_image(img):
-    img = img.resize((img.width * 2, img.height * 2))
-    img = img.convert('L')
-    img = img.point(lambda x: 0 if x < 150 else 255, '1')
-    return img
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    gray = cv2.resize(gray, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
+    _, binary = cv2.threshold(gray, 149, 255, cv2.THRESH_BINARY)
+    return binary
 
-def get_text_near_click(x, y, radius=200):
-    screenshot = pyautogui.screenshot()
-    region = (
-        max(0, x - radius),
-        max(0, y - radius),
-        min(screenshot.width, x + radius),
-        min(screenshot.height, y + radius)
-    )
-    cropped = screenshot.crop(region)
+def grab_click_region(x, y, radius=200):
+    # Only the area around the click is captured (cheap enough for the input hook);
+    # copied out of the capture buffer because OCR runs later on another thread
+    return capture.grab_region(*capture.region_around(x, y, radius)).copy()
+
+def read_click_region(cropped, clicked_at=None):
     cropped = preprocess_image(cropped)
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    timestamp = (clicked_at or datetime.now()).strftime("%Y%m%d_%H%M%S")
     img_path = os.path.join(SNAPSHOT_FOLDER, f"snap_{timestamp}.png")
-    cropped.save(img_path)
+    cv2.imwrite(img_path, cropped)
 
-    text = pytesseract.image_to_string(cropped).strip()
+    text = ocr_pool.read(cropped).strip()
     return text if text else "No readable text"
 
+def get_text_near_click(x, y, radius=200):
+    return read_click_region(grab_click_region(x, y, radius))
+
 def take_full_screenshot():
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filepath = os.path.join(SNAPSHOT_FOLDER, f"F10_screenshot_{timestamp}.png")
-    pyautogui.screenshot(filepath)
+    cv2.imwrite(filepath, capture.grab_full())
     print(f"Screenshot saved: {filepath}")
     write_log_step(get_active_window_title(), screenshot_note=f"Saved at {filepath}")
 
 # ----------- Event Handlers ------------
+def log_click(clicked_at, window_title, detected_text):
+    if detected_text != "No readable text":
+        append_log_step(clicked_at, window_title, clicked=detected_text)
+    else:
+        append_log_step(clicked_at, window_title, clicked="(no text detected near click)")
+
 def on_click(x, y, button, pressed):
     if pressed:
+        # Runs on the OS input hook: capture and return, OCR happens on the pool
+        clicked_at = datetime.now()
         window_title = get_active_window_title()
-        detected_text = get_text_near_click(x, y)
-        if detected_text != "No readable text":
-            write_log_step(window_title, clicked=detected_text)
-        else:
-            write_log_step(window_title, clicked="(no text detected near click)")
+        region = grab_click_region(x, y)
+        step_writer.submit(lambda: read_click_region(region, clicked_at),
+                           partial(log_click, clicked_at, window_title),
+                           fallback="(OCR skipped, click queue full)", failed="(OCR failed)")
 
 def on_press(key):
     global typed_text_buffer, last_window
@@ -139,3 +160,8 @@ try:
         time.sleep(1)
 except KeyboardInterrupt:
     write_log_step("System", screenshot_note="Monitoring stopped by keyboard interrupt.")
+
+step_writer.close()
+print(f"Step writer: {step_writer.summary()}")
+ocr_pool.close()
+print(f"OCR: {ocr_pool.summary()}")
@@ -0,0 +1,225 @@
+import argparse
+import importlib.util
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from latency_stats import LatencyStats
+
+# tesserocr is imported by the first OcrPool, once it knows whether to cap
+# Tesseract's OpenMP threads (the limit is read when the library loads)
+tesserocr = None
+HAVE_TESSEROCR = importlib.util.find_spec("tesserocr") is not None
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+# === PERSISTENT OCR ENGINE POOL ===
+# pytesseract.image_to_string writes the image to a temp file and starts a
+# tesseract process that reloads the language data. For a small click
+# region, that startup costs more than the recognition itself. OcrPool
+# keeps up to `size` Tesseract instances alive and lends one to each read():
+#
+#   tesserocr    in-process Tesseract API (pip install tesserocr); NumPy
+#                buffers are passed to it directly, with no temp files.
+#                Recognition releases the GIL, so pool threads run in
+#                parallel.
+#   pytesseract  fallback when tesserocr isn't installed: same results as
+#                before, still one tesseract process per call
+#
+# An engine is not thread-safe, so each is used by one thread at a time.
+# Engines are created on first use. A pool built at import time is
+# therefore cheap, including in worker processes that never OCR.
+#
+# Tesseract also parallelizes each read with OpenMP. Running several
+# engines (size > 1), or one pool in each of several processes
+# (processes > 1), would oversubscribe the cores, and is often slower than
+# serial OCR. So in that case the pool sets OMP_THREAD_LIMIT=1 unless the
+# environment already sets it. The setting reaches both in-process engines
+# and tesseract subprocesses.
+
+BACKENDS = ("auto", "tesserocr", "pytesseract")
+
+
+def _import_tesserocr():
+    global tesserocr
+    if tesserocr is None:
+        import tesserocr as module
+        tesserocr = module
+
+
+class TesserocrEngine:
+    name = "tesserocr"
+
+    def __init__(self, lang, tessdata):
+        kwargs = {"lang": lang}
+        if tessdata:
+            kwargs["path"] = tessdata
+        self._api = tesserocr.PyTessBaseAPI(**kwargs)
+
+    def read(self, image):
+        if image.ndim == 3:  # Tesseract wants RGB(A) byte order
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB if image.shape[2] == 3 else cv2.COLOR_BGRA2RGBA)
+        image = np.ascontiguousarray(image, np.uint8)
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+        self._api.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+        return self._api.GetUTF8Text()
+
+    def close(self):
+        self._api.End()
+
+
+class PytesseractEngine:
+    name = "pytesseract"
+
+    def __init__(self, lang, tessdata):
+        self.lang = lang
+
+    def read(self, image):
+        return pytesseract.image_to_string(image, lang=self.lang)
+
+    def close(self):
+        pass
+
+
+class OcrPool:
+    def __init__(self, size=2, lang="eng", tesseract_cmd=None, tessdata=None, backend="auto", processes=1):
+        # processes: how many processes each run a pool like this one
+        if backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {BACKENDS}, got {backend!r}")
+        if backend == "auto":
+            backend = "tesserocr" if HAVE_TESSEROCR else "pytesseract"
+        if size > 1 or processes > 1:
+            os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+        if backend == "tesserocr":
+            _import_tesserocr()
+        if tesseract_cmd and pytesseract is not None:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+        if tessdata is None and tesseract_cmd:
+            # A Windows install keeps tessdata next to tesseract.exe
+            candidate = os.path.join(os.path.dirname(tesseract_cmd), "tessdata")
+            tessdata = candidate if os.path.isdir(candidate) else None
+        self.size = max(1, size)
+        self.lang = lang
+        self.tessdata = tessdata
+        self._engine_class = TesserocrEngine if backend == "tesserocr" else PytesseractEngine
+        self.backend = self._engine_class.name
+        self._idle = queue.LifoQueue()  # most recently used engine first
+        self._created = 0
+        self._lock = threading.Lock()
+        self._executor = None
+        self.latency = LatencyStats()
+
+    def _acquire(self):
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            if create:
+                break
+            try:
+                return self._idle.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        try:
+            return self._engine_class(self.lang, self.tessdata)
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def read(self, image):
+        # NumPy image (grey, BGR or BGRA) -> recognized text
+        engine = self._acquire()
+        start = time.perf_counter()
+        try:
+            return engine.read(image)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._idle.put(engine)
+            with self._lock:
+                self.latency.add(elapsed)
+
+    def warm_up(self):
+        # Create all `size` engines now, so none loads its language data during a read
+        engines = [self._acquire() for _ in range(self.size)]
+        for engine in engines:
+            self._idle.put(engine)
+
+    def submit(self, image):
+        # read() on one of `size` pool threads; returns a Future
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="ocr")
+        return self._executor.submit(self.read, image)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        self._created = 0
+
+    def summary(self):
+        return f"{self.backend} x{self._created}/{self.size}: {self.latency.count} reads, {self.latency.line()}"
+
+
+# === BENCHMARK: pool vs. pytesseract.image_to_string ===
+def sample_image(width=400, height=400):
+    # A click region's worth of UI text
+    image = np.full((height, width, 3), 255, np.uint8)
+    for row, text in enumerate(("File  Edit  View  Help", "Save changes?", "[ OK ]   [ Cancel ]",
+                                "Settings > Privacy", "Sign in to continue")):
+        cv2.putText(image, text, (10, 50 + row * 70), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 0), 2)
+    return image
+
+
+def benchmark(image_path=None, runs=20, size=2, tesseract_cmd=None, lang="eng"):
+    image = cv2.imread(image_path) if image_path else sample_image()
+    if image is None:
+        raise SystemExit(f"Can't read {image_path}")
+    pool = OcrPool(size, lang, tesseract_cmd)
+    print(f"[BENCH] {image.shape[1]}x{image.shape[0]} image, {runs} reads each, pool: {pool.backend} x{size}")
+    tests = [(f"OcrPool.read ({pool.backend}), 1 thread", lambda: [pool.read(image) for _ in range(runs)]),
+             (f"OcrPool.submit ({pool.backend}), {size} threads",
+              lambda: [f.result() for f in [pool.submit(image) for _ in range(runs)]])]
+    if pytesseract is not None:
+        tests.insert(0, ("pytesseract.image_to_string", lambda: [pytesseract.image_to_string(image, lang=lang)
+                                                                 for _ in range(runs)]))
+    pool.warm_up()  # every engine loads its language data before the timed runs
+    for label, run in tests:
+        start = time.perf_counter()
+        texts = run()
+        elapsed = time.perf_counter() - start
+        print(f"[BENCH] {label:<40}: {elapsed / runs * 1000:7.1f} ms/read ({runs / elapsed:6.1f} reads/s)")
+    print(f"[BENCH] text: {' | '.join(texts[0].split())[:80]}")
+    print(f"[BENCH] pool: {pool.summary()}")
+    pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the OCR engine pool against pytesseract.")
+    parser.add_argument("--image", help="image to OCR (default: generated UI text)")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--tesseract-cmd", help="path to the tesseract executable")
+    parser.add_argument("--lang", default="eng")
+    args = parser.parse_args()
+    benchmark(args.image, args.runs, args.pool_size, args.tesseract_cmd, args.lang)
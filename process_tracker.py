@@ -0,0 +1,109 @@
+import psutil
+from collections import namedtuple, defaultdict
+
+# --------- Incremental process table ---------
+# psutil.pids() is cheap; opening a process to read its name is not. The
+# tracker keeps every live process keyed on (pid, create_time), only inspects
+# PIDs it has not seen before, and reports what started and exited since the
+# previous scan. Classification tags are computed once per process name and
+# kept as reference counts, so browser/document/music state is updated from
+# the diff instead of being recomputed over the whole table.
+
+ProcessEvent = namedtuple("ProcessEvent", "kind pid create_time name")
+
+
+class ProcessTracker:
+    def __init__(self, classify=None, full_check_every=30):
+        self.classify = classify or (lambda name: ())
+        self.full_check_every = full_check_every
+        self._by_pid = {}                       # pid -> (create_time, name)
+        self._name_counts = {}                  # name -> live process count
+        self._tag_counts = defaultdict(dict)    # group -> {label: live name count}
+        self._tags = {}                         # name -> classification tags
+        self._scans = 0
+
+    def scan(self):
+        self._scans += 1
+        pids = set(psutil.pids())
+        started, exited = [], []
+
+        for pid in [p for p in self._by_pid if p not in pids]:
+            exited.append(self._remove(pid))
+
+        # PIDs get reused; every few scans make sure cached entries still
+        # belong to the same process.
+        if self.full_check_every and self._scans % self.full_check_every == 0:
+            for pid, (create_time, _) in list(self._by_pid.items()):
+                if create_time is None:  # couldn't be read (access denied); keep the entry
+                    continue
+                try:
+                    if psutil.Process(pid).create_time() == create_time:
+                        continue
+                except psutil.NoSuchProcess:
+                    pass
+                except psutil.Error:
+                    continue  # denied now, but the PID is still live: keep the entry
+                exited.append(self._remove(pid))
+
+        for pid in pids:
+            if pid in self._by_pid:
+                continue
+            # create_time() is often denied for system/service processes while
+            # name() still works, so each is read on its own; a failure is
+            # remembered as None so the PID isn't retried every tick
+            try:
+                proc = psutil.Process(pid)
+            except psutil.NoSuchProcess:
+                continue
+            except psutil.Error:
+                proc = None
+            create_time = name = None
+            if proc is not None:
+                try:
+                    create_time = proc.create_time()
+                except psutil.NoSuchProcess:
+                    continue
+                except psutil.Error:
+                    pass
+                try:
+                    name = proc.name() or None
+                except psutil.NoSuchProcess:
+                    continue
+                except psutil.Error:
+                    pass
+            self._by_pid[pid] = (create_time, name)
+            if name:
+                self._add_name(name)
+                started.append(ProcessEvent("start", pid, create_time, name))
+
+        return started, [e for e in exited if e.name]
+
+    def _remove(self, pid):
+        create_time, name = self._by_pid.pop(pid)
+        if name:
+            self._name_counts[name] -= 1
+            if not self._name_counts[name]:
+                del self._name_counts[name]
+                for group, label in self._tags[name]:
+                    labels = self._tag_counts[group]
+                    labels[label] -= 1
+                    if not labels[label]:
+                        del labels[label]
+        return ProcessEvent("exit", pid, create_time, name)
+
+    def _add_name(self, name):
+        if name in self._name_counts:
+            self._name_counts[name] += 1
+            return
+        self._name_counts[name] = 1
+        if name not in self._tags:
+            self._tags[name] = tuple(self.classify(name))
+        for group, label in self._tags[name]:
+            labels = self._tag_counts[group]
+            labels[label] = labels.get(label, 0) + 1
+
+    def names(self):
+        return list(self._name_counts)
+
+    def labels(self, group):
+        return list(self._tag_counts[group])
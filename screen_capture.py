@@ -0,0 +1,198 @@
+import argparse
+import threading
+import time
+
+import cv2
+import numpy as np
+
+try:
+    import mss
+except ImportError:
+    mss = None
+
+# === SCREEN CAPTURE BACKENDS ===
+# grab_region(left, top, width, height) and grab_full() return BGR uint8
+# NumPy frames (what cv2.VideoWriter, cv2.imwrite and Tesseract take)
+# written into a buffer preallocated per thread and size. The returned
+# array is reused by the next grab of the same size on the same thread:
+# copy it if it has to outlive that, or pass `out=` to fill your own.
+#
+#   mss        native grab of just the requested rectangle (one mss handle
+#              per thread; handles can't be shared across threads)
+#   pyautogui  fallback when mss isn't installed (full PIL screenshot)
+#   synthetic  headless source for benchmarks: frames from a video/image
+#              file, or generated moving content when no file is given
+
+
+class ScreenCapture:
+    name = "base"
+
+    def __init__(self, size):
+        self.size = size  # (width, height)
+        self._local = threading.local()
+
+    def _buffer(self, width, height, out):
+        if out is not None:
+            return out
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None:
+            buffers = self._local.buffers = {}
+        buf = buffers.get((width, height))
+        if buf is None:
+            buf = buffers[(width, height)] = np.empty((height, width, 3), np.uint8)
+        return buf
+
+    def region_around(self, x, y, radius):
+        # (left, top, width, height) of a square around (x, y), clipped to the screen
+        width, height = self.size
+        left, top = max(0, x - radius), max(0, y - radius)
+        right, bottom = min(width, x + radius), min(height, y + radius)
+        return left, top, max(1, right - left), max(1, bottom - top)
+
+    def grab_region(self, left, top, width, height, out=None):
+        return self._grab(left, top, width, height, self._buffer(width, height, out))
+
+    def grab_full(self, out=None):
+        width, height = self.size
+        return self.grab_region(0, 0, width, height, out)
+
+    def close(self):
+        pass
+
+
+class MssCapture(ScreenCapture):
+    name = "mss"
+
+    def __init__(self, monitor=1):
+        self.monitor_index = monitor
+        with mss.mss() as sct:
+            self.monitor = sct.monitors[monitor]
+        super().__init__((self.monitor["width"], self.monitor["height"]))
+
+    def _sct(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            sct = self._local.sct = mss.mss()
+        return sct
+
+    def _grab(self, left, top, width, height, buf):
+        shot = self._sct().grab({"left": self.monitor["left"] + left, "top": self.monitor["top"] + top,
+                                 "width": width, "height": height})
+        bgra = np.frombuffer(shot.raw, np.uint8).reshape(shot.height, shot.width, 4)
+        return cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=buf)
+
+    def close(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is not None:
+            sct.close()
+            self._local.sct = None
+
+
+class PyAutoGuiCapture(ScreenCapture):
+    name = "pyautogui"
+
+    def __init__(self):
+        import pyautogui
+        self._pyautogui = pyautogui
+        super().__init__(tuple(pyautogui.size()))
+
+    def _grab(self, left, top, width, height, buf):
+        rgb = np.asarray(self._pyautogui.screenshot(region=(left, top, width, height)))
+        return cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR, dst=buf)
+
+
+class SyntheticCapture(ScreenCapture):
+    name = "synthetic"
+    GENERATED_FRAMES = 30  # pre-rendered so grabs cost a copy, like a real backend
+
+    def __init__(self, source=None, size=(1920, 1080)):
+        self._lock = threading.Lock()
+        self._video = self._image = None
+        if source is not None:
+            self._image = cv2.imread(source)
+            if self._image is None:
+                self._video = cv2.VideoCapture(source)
+                if not self._video.isOpened():
+                    raise ValueError(f"Can't read frames from {source}")
+                size = (int(self._video.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                        int(self._video.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            else:
+                size = (self._image.shape[1], self._image.shape[0])
+        super().__init__(size)
+        self._screen = np.empty((size[1], size[0], 3), np.uint8)
+        self._generated = [] if source is not None else [self._generate(i) for i in range(self.GENERATED_FRAMES)]
+        self.frames = 0
+
+    def _generate(self, index):
+        # Gradient desktop, a moving window and a frame counter
+        width, height = self.size
+        screen = np.empty((height, width, 3), np.uint8)
+        screen[:] = (index * 3 % 256, 96, 160)
+        x = index * 7 % max(1, width - 200)
+        cv2.rectangle(screen, (x, height // 4), (x + 200, height // 4 + 150), (240, 240, 240), -1)
+        cv2.putText(screen, f"frame {index}", (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 0), 3)
+        return screen
+
+    def _next_screen(self):
+        if self._image is not None:
+            return self._image
+        if self._video is not None:
+            ret, _ = self._video.read(self._screen)
+            if not ret:  # loop the recording
+                self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                self._video.read(self._screen)
+            return self._screen
+        return self._generated[self.frames % len(self._generated)]
+
+    def _grab(self, left, top, width, height, buf):
+        with self._lock:
+            screen = self._next_screen()
+            self.frames += 1
+            np.copyto(buf, screen[top:top + height, left:left + width])
+        return buf
+
+    def close(self):
+        if self._video is not None:
+            self._video.release()
+
+
+def open_capture(backend="auto", source=None):
+    if backend == "synthetic":
+        return SyntheticCapture(source)
+    if backend == "mss" or (backend == "auto" and mss is not None):
+        return MssCapture()
+    return PyAutoGuiCapture()
+
+
+# === BENCHMARK: ms per grab ===
+def benchmark(backend="auto", source=None, frames=200, radius=200):
+    capture = open_capture(backend, source)
+    width, height = capture.size
+    print(f"[BENCH] {capture.name} backend, screen {width}x{height}, {frames} grabs each")
+    tests = [("full screen", capture.grab_full),
+             (f"{radius * 2}x{radius * 2} region",
+              lambda: capture.grab_region(*capture.region_around(width // 2, height // 2, radius)))]
+    if backend != "synthetic":
+        try:
+            import pyautogui
+            tests.append(("pyautogui.screenshot() -> NumPy BGR",
+                          lambda: cv2.cvtColor(np.array(pyautogui.screenshot()), cv2.COLOR_RGB2BGR)))
+        except ImportError:
+            pass
+    for label, grab in tests:
+        grab()  # warm-up
+        start = time.perf_counter()
+        for _ in range(frames):
+            grab()
+        elapsed = time.perf_counter() - start
+        print(f"[BENCH] {label:<36}: {elapsed / frames * 1000:7.2f} ms/grab ({frames / elapsed:6.1f} fps)")
+    capture.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark screen capture backends.")
+    parser.add_argument("--backend", default="auto", choices=["auto", "mss", "pyautogui", "synthetic"])
+    parser.add_argument("--source", help="video or image file for the synthetic backend")
+    parser.add_argument("--frames", type=int, default=200)
+    args = parser.parse_args()
+    benchmark(args.backend, args.source, args.frames)
@@ -0,0 +1,104 @@
+import time
+
+import cv2
+import numpy as np
+
+from frame_encoder import FrameEncoder
+from latency_stats import LatencyStats
+from tile_recording import TileWriter
+
+# === FRAME-PACED SCREEN RECORDER ===
+# Frames are captured on a fixed schedule (slot k is due at start + k/fps on
+# the monotonic clock) instead of as fast as the grab allows, so the video
+# plays back at real speed and frame index * (1/fps) is a real timestamp.
+# When capture + encode overruns a whole slot, the missed slots are filled
+# with the previous frame (fill_missed=True) or dropped and counted
+# (fill_missed=False: shorter file, fewer encodes). Between slots the
+# recorder sleeps rather than spinning a core.
+#
+# crop=(left, top, width, height) grabs only that part of the screen and
+# scale < 1 downscales it, both of which cut encode cost. Encoding runs on a
+# FrameEncoder thread (queue_slots buffers). The default overflow="block"
+# keeps every slot in the file, so frame count still matches wall time. A
+# dropping policy keeps capture on schedule instead, and the frames the
+# encoder drops are counted as dropped slots.
+# recording_format="tiles" writes the tile delta format (tile_recording.py)
+# instead of a video file: only changed screen tiles are stored.
+
+
+class PacedRecorder:
+    def __init__(self, capture, fps=20.0, scale=1.0, crop=None, fourcc="XVID", fill_missed=True,
+                 queue_slots=8, overflow="block", recording_format="video"):
+        self.capture = capture
+        self.fps = fps
+        self.fourcc = fourcc
+        self.fill_missed = fill_missed
+        self.queue_slots = queue_slots
+        self.overflow = overflow
+        self.recording_format = recording_format
+        self.encoder = self.tile_writer = None
+        self.region = crop or (0, 0, *capture.size)
+        width, height = self.region[2], self.region[3]
+        self.frame_size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        self._scaled = None
+        if self.frame_size != (width, height):
+            self._scaled = np.empty((self.frame_size[1], self.frame_size[0], 3), np.uint8)
+        self.captured = self.written = self.duplicated = self.dropped = 0
+        self.elapsed = 0.0
+        self.capture_latency = LatencyStats()
+
+    def _grab(self):
+        start = time.perf_counter()
+        frame = self.capture.grab_region(*self.region)
+        if self._scaled is not None:
+            frame = cv2.resize(frame, self.frame_size, dst=self._scaled, interpolation=cv2.INTER_AREA)
+        self.capture_latency.add(time.perf_counter() - start)
+        self.captured += 1
+        return frame
+
+    def _write(self, out, frame):
+        if out.write(frame):
+            self.written += 1
+
+    def record(self, path, keep_running):
+        if self.recording_format == "tiles":
+            self.tile_writer = TileWriter(path, self.fps, self.frame_size)
+        out = self.encoder = FrameEncoder(path, self.fps, self.frame_size, self.fourcc, self.queue_slots,
+                                          self.overflow, name="RECORDER", writer=self.tile_writer)
+        interval = 1.0 / self.fps
+        start = time.monotonic()
+        slot = 0
+        try:
+            while keep_running():
+                delay = start + slot * interval - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                frame = self._grab()
+                self._write(out, frame)
+                slot += 1
+
+                # Slots whose whole interval passed during that grab + encode
+                missed = int((time.monotonic() - start) / interval) - slot
+                if missed > 0:
+                    if self.fill_missed:
+                        for _ in range(missed):
+                            self._write(out, frame)
+                        self.duplicated += missed
+                    else:
+                        self.dropped += missed
+                    slot += missed
+        finally:
+            self.elapsed = time.monotonic() - start
+            out.release()
+            # Only frames that reached the file count (drop_oldest evicts queued ones)
+            self.written = out.encoded
+            self.dropped += out.dropped
+
+    def summary(self):
+        elapsed = self.elapsed or 1e-9
+        width, height = self.frame_size
+        return (f"{self.written} frames ({width}x{height}) in {elapsed:.1f}s = {self.written / elapsed:.1f} fps "
+                f"written (target {self.fps:g}), {self.captured / elapsed:.1f} fps captured, "
+                f"{self.duplicated} duplicated / {self.dropped} dropped slots (missed or encoder overflow); "
+                f"capture {self.capture_latency.line()}; encoder: {self.encoder.summary() if self.encoder else 'n/a'}"
+                + (f"; tiles: {self.tile_writer.summary()}" if self.tile_writer else ""))
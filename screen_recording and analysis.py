@@ -5,25 +5,33 @@ import pygetwindow as gw
 from pynput import keyboard, mouse
 from datetime import datetime
 from threading import Thread
+from activity_events import EventWriter
+from process_tracker import ProcessTracker
+from app_classifier import load_classifier
 
 # Output folder
 output_dir = r"D:\ScreenRecordings"
 os.makedirs(output_dir, exist_ok=True)
 
-log_file_path = os.path.join(output_dir, "sop_activity_log.txt")
+log_file_path = os.path.join(output_dir, "sop_activity_log.evt")
+app_rules_path = os.path.join(output_dir, "app_rules.json")
+
+# Log sink: buffered writes, periodic fsync checkpoints
+LOG_BATCH_SIZE = 30
+LOG_FLUSH_INTERVAL = 5.0
+LOG_FSYNC_EVERY = 6
 
 # Global stores
 key_log = []
 click_log = []
-activity_log = []
+activity_log = EventWriter(log_file_path, LOG_BATCH_SIZE, LOG_FLUSH_INTERVAL, LOG_FSYNC_EVERY)
 
 recording = True
 
 # Mouse click detection
 def on_click(x, y, button, pressed):
     if pressed:
-        log = f"Mouse clicked at ({x}, {y}) with {button}"
-        click_log.append(log)
+        click_log.append((x, y, button))
 
 # Keyboard key detection
 def on_press(key):
@@ -32,36 +40,14 @@ def on_press(key):
     except AttributeError:
         key_log.append(f"Special key pressed: {key}")
 
-# Helper functions
-def detect_running_browsers(process_list):
-    browsers = ['chrome', 'firefox', 'msedge', 'brave', 'opera', 'iexplore']
-    running = [p for p in process_list if any(browser in p.lower() for browser in browsers)]
-    return list(set(running))
-
-def detect_open_documents(process_list):
-    doc_types = {
-        'Word': ['winword'],
-        'Excel': ['excel'],
-        'PowerPoint': ['powerpnt'],
-        'PDF Reader': ['acrord32', 'foxit', 'pdf'],
-        'Notepad': ['notepad'],
-        'VSCode': ['code'],
-        'Notepad++': ['notepad++']
-    }
-
-    open_docs = []
-    for name, keywords in doc_types.items():
-        for proc in process_list:
-            if any(k in proc.lower() for k in keywords):
-                open_docs.append(name)
-                break
-
-    return open_docs
+# Process classification: browsers, documents, music (custom rules in app_rules.json)
+app_classifier = load_classifier(app_rules_path)
+process_tracker = ProcessTracker(app_classifier.classify)
 
 # Monitor thread
 def monitor_thread():
     while recording:
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        timestamp = datetime.now()
 
         # Active window
         try:
@@ -69,13 +55,14 @@ def monitor_thread():
         except:
             active_window = "Unknown"
 
-        # Background apps
-        processes = [p.info['name'] for p in psutil.process_iter(['name']) if p.info['name']]
-        unique_processes = list(set(processes))
+        # Background apps: only new/exited processes are inspected
+        started, exited = process_tracker.scan()
+        activity_log.process_events(timestamp, started + exited)
+        unique_processes = process_tracker.names()
 
-        # Detect browsers and documents
-        running_browsers = detect_running_browsers(unique_processes)
-        open_documents = detect_open_documents(unique_processes)
+        # Browsers and documents, kept up to date from the process diff
+        running_browsers = process_tracker.labels("browser")
+        open_documents = process_tracker.labels("document")
 
         # Battery info
         battery = psutil.sensors_battery()
@@ -83,22 +70,12 @@ def monitor_thread():
 
         # Media status
         music_status = "Not Detected"
-        if any("spotify" in p.lower() or "chrome" in p.lower() for p in unique_processes):
+        if process_tracker.labels("music"):
             music_status = "Possibly Playing"
 
         # Log
-        log_entry = f"\n[{timestamp}]\n"
-        log_entry += f"Active Window: {active_window}\n"
-        log_entry += f"Mouse Clicks: {click_log.copy()}\n"
-        log_entry += f"Keys Pressed: {key_log.copy()}\n"
-        log_entry += f"Running Browsers: {', '.join(running_browsers) if running_browsers else 'None'}\n"
-        log_entry += f"Open Documents: {', '.join(open_documents) if open_documents else 'None'}\n"
-        log_entry += f"Top Background Apps: {', '.join(unique_processes[:5])}\n"
-        log_entry += f"Music Status: {music_status}\n"
-        log_entry += f"Battery: {battery_status}\n"
-        log_entry += "-" * 60
-
-        activity_log.append(log_entry)
+        activity_log.screen_tick(timestamp, active_window, click_log.copy(), key_log.copy(), running_browsers,
+                                 open_documents, unique_processes[:5], music_status, battery_status)
         click_log.clear()
         key_log.clear()
         time.sleep(1)
@@ -123,11 +100,7 @@ except KeyboardInterrupt:
     recording = False
     thread.join()
 
-    # Save log
-    with open(log_file_path, "w", encoding="utf-8") as f:
-        f.write("Activity Log Summary\n")
-        f.write("=" * 50 + "\n")
-        for entry in activity_log:
-            f.write(entry + "\n")
+    # Flush remaining entries
+    activity_log.close()
 
     print(f"\nActivity log saved to: {log_file_path}")
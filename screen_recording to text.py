@@ -1,11 +1,26 @@
 import cv2
-import pytesseract
 import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from frame_change import ChangeGate
+from frame_sampler import FrameSampler, per_second
+from ocr_engine import OcrPool
+from tile_recording import open_recording
+from video_pipeline import VideoPipeline
 
 # Set path to tesseract.exe (Update this path if different)
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+TESSERACT_CMD = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
-def extract_text_from_frame(frame):
+PREPROCESS_WORKERS = 2  # threads preparing frames while Tesseract runs
+QUEUE_SIZE = 16         # frames buffered between pipeline stages
+SEGMENT_WORKERS = os.cpu_count() or 1  # processes for parallel mode (1 = single pipeline)
+SEGMENT_SECONDS = 600   # longest slice of the recording one worker analyzes at a time
+OCR_POOL_SIZE = 2       # long-lived Tesseract engines per process (in-process when tesserocr is installed);
+                        # with > 1 engine or > 1 segment worker each engine runs single-threaded
+                        # (OMP_THREAD_LIMIT=1) so engines x processes don't oversubscribe the cores
+
+ocr_pool = OcrPool(OCR_POOL_SIZE, tesseract_cmd=TESSERACT_CMD, processes=SEGMENT_WORKERS)  # engines load on first use
+
+def prepare_frame_for_ocr(frame):
     # Resize image for better OCR
     frame = cv2.resize(frame, None, fx=1.5, fy=1.5, interpolation=cv2.INTER_LINEAR)
 
@@ -18,12 +33,16 @@ def extract_text_from_frame(frame):
                                  cv2.THRESH_BINARY, 11, 2)
 
     # Invert colors (helps with dark mode)
-    inverted = cv2.bitwise_not(gray)
+    return cv2.bitwise_not(gray)
 
+def ocr_image(image):
     # OCR to extract text
-    text = pytesseract.image_to_string(inverted)
+    text = ocr_pool.read(image)
     return text.strip()
 
+def extract_text_from_frame(frame):
+    return ocr_image(prepare_frame_for_ocr(frame))
+
 def detect_mouse_cursor(frame):
     # Convert to grayscale and threshold to detect white regions
     gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
@@ -33,52 +52,137 @@ def detect_mouse_cursor(frame):
     # Heuristic: if white pixels > threshold, assume cursor is visible
     return white_area > 500
 
-def analyze_video(video_path, output_log='D:/screen_analysis_log.txt'):
-    cap = cv2.VideoCapture(video_path)
+# --------- Pipeline stages ---------
+def gated_frames(sampler, change_gate):
+    # Decoder stage: gate in frame order; a changed frame gets a Future that
+    # later identical frames share while its OCR is still running
+    for _, timestamp, frame in sampler:
+        frame_hash, thumb, text = change_gate.key(frame)
+        needs_ocr = text is None
+        if needs_ocr:
+            text = Future()
+            change_gate.store(frame_hash, thumb, text)
+        yield timestamp, frame, text, needs_ocr
+
+def prepare_frame(item):
+    timestamp, frame, text, needs_ocr = item
+    image = prepare_frame_for_ocr(frame) if needs_ocr else None
+    return timestamp, image, text, detect_mouse_cursor(frame)
+
+def ocr_frames(items):
+    # The batch is read concurrently, one pool engine per frame
+    reads = [(timestamp, text, ocr_pool.submit(image)) for timestamp, image, text, _ in items if image is not None]
+    for timestamp, text, read in reads:
+        try:
+            text.set_result(read.result().strip())
+        except Exception as e:
+            print(f"OCR failed at {timestamp:.2f}s: {e}")
+            text.set_result("")
+    return [(timestamp, text, mouse_present) for timestamp, _, text, mouse_present in items]
+
+def format_entry(timestamp, text, mouse_present):
+    log = f"Time {timestamp:.2f}s: "
+    if text:
+        log += f"[Text Detected]: {text}. "
+    if mouse_present:
+        log += "[Mouse Cursor Detected]"
+    return log if text or mouse_present else None
+
+def save_analysis_log(analysis_log, output_log):
+    # Write results to file
+    with open(output_log, 'w', encoding='utf-8') as f:
+        for entry in analysis_log:
+            f.write(entry + '\n')
+
+    print(f"✅ Analysis complete. Log saved to: {output_log}")
+
+def analyze_video(video_path, output_log='D:/screen_analysis_log.txt', policy=per_second(1)):
+    cap = open_recording(video_path)  # .avi or tile recording
     if not cap.isOpened():
         print("Error opening video file.")
         return
 
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    interval = int(fps * 1)  # Analyze 1 frame per second
-
-    frame_id = 0
     analysis_log = []
+    change_gate = ChangeGate()  # only OCR frames whose content changed
+    sampler = FrameSampler(cap, policy, video_path)  # default: 1 frame per second
 
-    print("Analyzing video...")
-
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
+    def write_entry(item):
+        timestamp, text, mouse_present = item
+        log = format_entry(timestamp, text.result(), mouse_present)
+        if log:
+            analysis_log.append(log)
 
-        if frame_id % interval == 0:
-            timestamp = frame_id / fps
-
-            # Extract text and mouse detection
-            text = extract_text_from_frame(frame)
-            mouse_present = detect_mouse_cursor(frame)
-
-            log = f"Time {timestamp:.2f}s: "
-            if text:
-                log += f"[Text Detected]: {text}. "
-            if mouse_present:
-                log += "[Mouse Cursor Detected]"
-
-            if text or mouse_present:
-                analysis_log.append(log)
+    print("Analyzing video...")
 
-        frame_id += 1
+    # decode -> OCR preprocessing + cursor detection (pool) -> Tesseract -> log, in order
+    pipeline = VideoPipeline(prepare_frame, ocr_frames, write_entry,
+                             workers=PREPROCESS_WORKERS, queue_size=QUEUE_SIZE, batch_size=OCR_POOL_SIZE)
+    pipeline.run(gated_frames(sampler, change_gate))
 
     cap.release()
+    print(f"Sampler: {sampler.summary()}")
+    print(f"OCR change gate: {change_gate.summary()}")
+    print(pipeline.summary())
+    print(f"OCR: {ocr_pool.summary()}")
+    save_analysis_log(analysis_log, output_log)
+
+# --------- Parallel mode: one time segment per process ---------
+# Frames are sampled at the same absolute indexes as analyze_video, but the
+# change gate does not carry across segments: each segment starts with an
+# empty gate, so its first sampled frame is always OCR'd, and a screen seen
+# in an earlier segment is read again. Entries at segment boundaries can
+# therefore differ slightly from a single-process run (a fresh read instead
+# of a reused one), at the cost of at most a few extra OCR calls per segment.
+def analyze_segment(video_path, start_frame, end_frame, policy):
+    # Runs in a worker process with its own capture, seeked to the segment start
+    cap = open_recording(video_path)
+    change_gate = ChangeGate()
+    sampler = FrameSampler(cap, policy, video_path, start_frame=start_frame, end_frame=end_frame)
+    entries = []
+    for _, timestamp, frame in sampler:
+        text = change_gate.process(frame, extract_text_from_frame)
+        log = format_entry(timestamp, text, detect_mouse_cursor(frame))
+        if log:
+            entries.append(log)
+    cap.release()
+    return entries, sampler.retrieved, change_gate.computed
 
-    # Write results to file
-    with open(output_log, 'w', encoding='utf-8') as f:
-        for entry in analysis_log:
-            f.write(entry + '\n')
+def split_segments(frame_count, fps, workers, segment_seconds=SEGMENT_SECONDS):
+    # At least one segment per worker, none longer than segment_seconds
+    count = max(workers, -(-frame_count // max(1, int(fps * segment_seconds))))
+    size = -(-frame_count // count)
+    return [(start, min(start + size, frame_count)) for start in range(0, frame_count, size)]
 
-    print(f"✅ Analysis complete. Log saved to: {output_log}")
+def analyze_video_parallel(video_path, output_log='D:/screen_analysis_log.txt', policy=per_second(1),
+                           workers=SEGMENT_WORKERS):
+    cap = open_recording(video_path)
+    if not cap.isOpened():
+        print("Error opening video file.")
+        return
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+    if workers <= 1 or frame_count <= 0:
+        # Unknown length (or one core): segments can't be planned
+        return analyze_video(video_path, output_log, policy)
+
+    segments = split_segments(frame_count, fps, workers)
+    print(f"Analyzing video in {len(segments)} segments on {workers} processes...")
+
+    analysis_log, decoded, computed = [], 0, 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(analyze_segment, video_path, start, end, policy) for start, end in segments]
+        # Segments are contiguous and in order, so concatenating keeps timestamp order
+        for future in futures:
+            entries, frames, ocr_calls = future.result()
+            analysis_log.extend(entries)
+            decoded += frames
+            computed += ocr_calls
+
+    print(f"Segments: {decoded} frames decoded, {computed} OCR calls")
+    save_analysis_log(analysis_log, output_log)
 
 # === Run Analysis ===
-video_input_path = "D:/screen_recording1.avi"  # Replace with your file
-analyze_video(video_input_path)
+if __name__ == "__main__":
+    video_input_path = "D:/screen_recording1.avi"  # Replace with your file
+    analyze_video_parallel(video_input_path)
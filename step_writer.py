@@ -0,0 +1,104 @@
+import heapq
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# === ORDERED STEP WRITER ===
+# Keeps slow work (OCR, image saving) off the pynput hook threads. A hook
+# callback takes a ticket and returns at once; the work runs on a small
+# thread pool and a single writer thread writes steps in ticket order, so
+# step numbers follow the order the events happened in.
+#
+#   log(write, *args)               ordered write with no background work
+#   submit(work, write, fallback, failed)
+#                                   work() on the pool, then write(result);
+#                                   when `max_pending` jobs are already
+#                                   waiting the work is dropped and
+#                                   write(fallback) is logged in its place,
+#                                   and when work() raises, write(failed)
+
+
+class OrderedStepWriter:
+    def __init__(self, workers=2, max_pending=32):
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="step-work")
+        self._results = queue.Queue()
+        self._lock = threading.Lock()
+        self._tickets = 0
+        self.pending = self.peak_pending = 0
+        self.dropped = self.failed = self.written = 0
+        self.max_latency = 0.0
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def _ticket(self):
+        with self._lock:
+            ticket = self._tickets
+            self._tickets += 1
+            return ticket
+
+    def log(self, write, *args, **kwargs):
+        self._results.put((self._ticket(), time.perf_counter(), partial(write, *args, **kwargs)))
+
+    def submit(self, work, write, fallback=None, failed=None):
+        queued_at = time.perf_counter()
+        with self._lock:
+            ticket = self._tickets
+            self._tickets += 1
+            full = self.pending >= self.max_pending
+            if full:
+                self.dropped += 1
+            else:
+                self.pending += 1
+                self.peak_pending = max(self.peak_pending, self.pending)
+        if full:
+            self._results.put((ticket, queued_at, partial(write, fallback)))
+            return False
+        self._pool.submit(self._run, ticket, queued_at, work, write, failed)
+        return True
+
+    def _run(self, ticket, queued_at, work, write, failed):
+        try:
+            result = work()
+        except Exception as e:
+            print(f"[ERROR] Background step failed: {e}")
+            with self._lock:
+                self.failed += 1
+            result = failed
+        with self._lock:
+            self.pending -= 1
+        self._results.put((ticket, queued_at, partial(write, result)))
+
+    def _write_loop(self):
+        waiting, next_ticket = [], 0
+        while True:
+            item = self._results.get()
+            if item is None:
+                break
+            heapq.heappush(waiting, item)
+            while waiting and waiting[0][0] == next_ticket:
+                _, queued_at, write = heapq.heappop(waiting)
+                try:
+                    write()
+                except Exception as e:
+                    print(f"[ERROR] Writing step failed: {e}")
+                self.written += 1
+                self.max_latency = max(self.max_latency, time.perf_counter() - queued_at)
+                next_ticket += 1
+
+    def queue_depth(self):
+        # Steps taken but not yet written (running work + waiting for order)
+        with self._lock:
+            return self._tickets - self.written
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        self._results.put(None)
+        self._writer.join()
+
+    def summary(self):
+        return (f"{self.written} steps written, {self.queue_depth()} queued, peak {self.peak_pending} "
+                f"pending OCR jobs, {self.dropped} dropped, {self.failed} failed, "
+                f"max step latency {self.max_latency:.2f}s")
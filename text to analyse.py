@@ -1,52 +1,99 @@
+import argparse
+import json
+import os
 import re
+import time
 from datetime import datetime, timedelta
 from collections import defaultdict, Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from activity_events import EventCursor, is_event_log, iter_screen_events, iter_vision_events
+from app_classifier import load_classifier
+
+try:
+    import numpy as np
+except ImportError:  # fall back to the pure-Python aggregation
+    np = None
 
 # --------- File Paths ---------
-screen_file_path = "D:/ScreenRecordings/sop_activity_log.txt"
-face_file_path = "D:/activity_log.txt"
+screen_file_path = "D:/ScreenRecordings/sop_activity_log.evt"
+face_file_path = "D:/activity_log.evt"
 report_output_path = "D:/user_activity_analysis_report.txt"
+checkpoint_path = "D:/user_activity_report_checkpoint.json"  # used by --incremental
+app_rules_path = "D:/ScreenRecordings/app_rules.json"  # same optional rules as the monitor
+
+app_classifier = load_classifier(app_rules_path)
+
+ENTRY_SEPARATOR = "------------------------------------------------------------"
+CHUNK_SIZE = 1 << 20      # characters read per chunk when streaming text logs
+BATCH_SIZE = 1 << 16      # entries per NumPy batch when aggregating a stream
+
+EPOCH = datetime(1970, 1, 1)
+ONE_US = timedelta(microseconds=1)
 
 # --------- Parse Screen Activity ---------
-def parse_screen_activity(path):
+# The iter_* parsers read fixed-size chunks and yield entries lazily; the
+# parse_* wrappers keep the old list-returning interface.
+def parse_screen_entry(entry):
+    lines = entry.strip().splitlines()
+    if not lines:
+        return None
+    log = {}
+    try:
+        log["timestamp"] = datetime.strptime(lines[0].strip("[]"), "%Y-%m-%d %H:%M:%S.%f")
+        for line in lines[1:]:
+            if ": " in line:
+                k, v = line.split(": ", 1)
+                log[k.strip()] = v.strip()
+        return log
+    except:
+        return None
+
+def iter_screen_activity(path, chunk_size=CHUNK_SIZE):
+    if is_event_log(path):
+        yield from iter_screen_events(path)
+        return
     with open(path, "r", encoding="utf-8") as f:
-        data = f.read()
-    entries = data.split("------------------------------------------------------------")
-    logs = []
+        pending = ""
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            entries = (pending + chunk).split(ENTRY_SEPARATOR)
+            pending = entries.pop()
+            for entry in entries:
+                log = parse_screen_entry(entry)
+                if log is not None:
+                    yield log
+    log = parse_screen_entry(pending)
+    if log is not None:
+        yield log
 
-    for entry in entries:
-        lines = entry.strip().splitlines()
-        if not lines:
-            continue
-        log = {}
-        try:
-            log["timestamp"] = datetime.strptime(lines[0].strip("[]"), "%Y-%m-%d %H:%M:%S.%f")
-            for line in lines[1:]:
-                if ": " in line:
-                    k, v = line.split(": ", 1)
-                    log[k.strip()] = v.strip()
-            logs.append(log)
-        except:
-            continue
-    return logs
+def parse_screen_activity(path):
+    return list(iter_screen_activity(path))
 
 # --------- Parse Face Activity ---------
-def parse_face_activity(path):
+def iter_face_activity(path):
+    if is_event_log(path):
+        yield from iter_vision_events(path)
+        return
     with open(path, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-    logs = []
-    for line in lines:
-        try:
-            ts, activity = line.strip().split(" - ", 1)
-            logs.append({"timestamp": datetime.strptime(ts, "%Y-%m-%d %H:%M:%S"), "activity": activity})
-        except:
-            continue
-    return logs
+        for line in f:
+            try:
+                ts, activity = line.strip().split(" - ", 1)
+                yield {"timestamp": datetime.strptime(ts, "%Y-%m-%d %H:%M:%S"), "activity": activity}
+            except:
+                continue
+
+def parse_face_activity(path):
+    return list(iter_face_activity(path))
 
 # --------- Normalize Typed Keys ---------
 def normalize_keys(key_entries):
     keys = []
     for entry in key_entries:
+        if isinstance(entry, list):  # event logs store keys as a list
+            entry = ' '.join(entry)
         cleaned = entry.strip("[]").replace("'", "").replace(",", "")
         tokens = cleaned.split()
         keys.extend(tokens)
@@ -80,45 +127,206 @@ def normalize_keys(key_entries):
 
     return keys, ''.join(typed_chars)
 
-# --------- Analyze & Report ---------
-def analyze_data(screen_logs, face_logs):
-    report = []
+# --------- Aggregate (pure Python) ---------
+# Both aggregation paths accept any iterable of entries, so parsers can be
+# streamed straight into them.
+def has_entries(value):
+    return value not in ("[]", [])
 
+def aggregate_screen(screen_logs):
     time_per_window = defaultdict(timedelta)
     typed_keys = defaultdict(list)
     mouse_clicks = defaultdict(int)
 
-    for i in range(len(screen_logs) - 1):
-        cur, next_ = screen_logs[i], screen_logs[i + 1]
+    cur = None
+    for next_ in screen_logs:
+        if cur is None:
+            cur = next_
+            continue
         window = cur.get("Active Window", "Unknown")
         duration = next_["timestamp"] - cur["timestamp"]
         time_per_window[window] += duration
 
-        if cur.get("Keys Pressed", "[]") != "[]":
+        if has_entries(cur.get("Keys Pressed", "[]")):
             typed_keys[window].append(cur["Keys Pressed"])
-        if cur.get("Mouse Clicks", "[]") != "[]":
+        if has_entries(cur.get("Mouse Clicks", "[]")):
             mouse_clicks[window] += 1
+        cur = next_
 
+    return time_per_window, typed_keys, mouse_clicks
+
+# Run-length vision logs hold intervals ("end" set) rather than frames. An
+# interval already is one state for its whole span, so it adds its duration
+# directly instead of voting per second; per-frame entries still vote.
+def split_intervals(face_logs, intervals):
+    for f in face_logs:
+        if "end" in f:
+            intervals.append(f)
+        else:
+            yield f
+
+def add_intervals(gaze_time, hand_activity, intervals):
+    hand_time = {}
+    for f in intervals:
+        duration = f["end"] - f["timestamp"]
+        gaze_time[f["activity"]] = gaze_time.get(f["activity"], timedelta()) + duration
+        if "hand" in f["activity"].lower():
+            hand_time[f["activity"]] = hand_time.get(f["activity"], timedelta()) + duration
+    for state, duration in hand_time.items():
+        hand_activity[state] = hand_activity.get(state, 0) + round(duration.total_seconds())
+
+def aggregate_face(face_logs):
     gaze_time = defaultdict(timedelta)
     hand_activity = defaultdict(int)
-    face_by_second = defaultdict(list)
+    face_by_second = defaultdict(Counter)
+    intervals = []
 
-    for f in face_logs:
+    for f in split_intervals(face_logs, intervals):
         second = f["timestamp"].replace(microsecond=0)
-        face_by_second[second].append(f["activity"])
+        face_by_second[second][f["activity"]] += 1
 
     for sec, activities in face_by_second.items():
-        common = Counter(activities).most_common(1)[0][0]
+        common = activities.most_common(1)[0][0]
         gaze_time[common] += timedelta(seconds=1)
         if "hand" in common.lower():
             hand_activity[common] += 1
 
+    add_intervals(gaze_time, hand_activity, intervals)
+    return gaze_time, hand_activity
+
+# --------- Aggregate (columnar, NumPy) ---------
+# Same results as the pure-Python aggregation, including dict ordering and
+# Counter tie-breaking: labels are coded in first-appearance order, so sorted
+# codes are also first-appearance order.
+LABEL_BITS = 16   # face states per log are few; (second, label) pairs pack into one int64
+
+def categorical_codes(values, index):
+    return np.fromiter((index.setdefault(v, len(index)) for v in values), dtype=np.int64, count=len(values))
+
+def timestamps_us(values):
+    return np.fromiter(((ts - EPOCH) // ONE_US for ts in values), dtype=np.int64, count=len(values))
+
+def first_appearance_order(codes):
+    unique, first = np.unique(codes, return_index=True)
+    return unique[np.argsort(first, kind="stable")]
+
+def batches(iterable, size=BATCH_SIZE):
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+def aggregate_screen_columnar(screen_logs):
+    time_per_window, typed_keys, mouse_clicks = {}, {}, {}
+    index, ts_parts, code_parts, click_parts, key_rows = {}, [], [], [], []
+    rows = 0
+    for batch in batches(screen_logs):
+        ts_parts.append(timestamps_us([e["timestamp"] for e in batch]))
+        code_parts.append(categorical_codes([e.get("Active Window", "Unknown") for e in batch], index))
+        click_parts.append(np.fromiter((has_entries(e.get("Mouse Clicks", "[]")) for e in batch), dtype=bool, count=len(batch)))
+        key_rows.extend((rows + i, e["Keys Pressed"]) for i, e in enumerate(batch) if has_entries(e.get("Keys Pressed", "[]")))
+        rows += len(batch)
+    if rows < 2:
+        return time_per_window, typed_keys, mouse_clicks
+
+    # The last entry has no successor, so it only bounds the previous one
+    windows = list(index)
+    codes = np.concatenate(code_parts)[:-1]
+    totals = np.bincount(codes, weights=np.diff(np.concatenate(ts_parts)), minlength=len(windows))
+    for code in np.unique(codes):
+        time_per_window[windows[code]] = timedelta(microseconds=int(round(totals[code])))
+
+    for row, keys in key_rows:
+        if row < rows - 1:
+            typed_keys.setdefault(windows[codes[row]], []).append(keys)
+
+    click_codes = codes[np.concatenate(click_parts)[:-1]]
+    if click_codes.size:
+        counts = np.bincount(click_codes)
+        for code in first_appearance_order(click_codes):
+            mouse_clicks[windows[code]] = int(counts[code])
+
+    return time_per_window, typed_keys, mouse_clicks
+
+def aggregate_face_columnar(face_logs):
+    gaze_time, hand_activity = {}, {}
+    index = {}
+    pairs = np.empty(0, np.int64)    # (second << LABEL_BITS) | label
+    firsts = np.empty(0, np.int64)   # first frame index of each pair
+    counts = np.empty(0, np.int64)
+    rows = 0
+    intervals = []
+
+    # Reduce each batch to per-(second, label) counts and merge them, so
+    # memory grows with seconds observed rather than frames logged.
+    for batch in batches(split_intervals(face_logs, intervals)):
+        secs = timestamps_us([f["timestamp"] for f in batch]) // 1_000_000
+        labels = categorical_codes([f["activity"] for f in batch], index)
+        if len(index) > 1 << LABEL_BITS:
+            raise ValueError("too many distinct face activity labels")
+        keys, first, count = np.unique((secs << LABEL_BITS) | labels, return_index=True, return_counts=True)
+        pairs, inverse = np.unique(np.concatenate((pairs, keys)), return_inverse=True)
+        merged_first = np.full(len(pairs), np.iinfo(np.int64).max)
+        np.minimum.at(merged_first, inverse, np.concatenate((firsts, first + rows)))
+        counts = np.bincount(inverse, weights=np.concatenate((counts, count))).astype(np.int64)
+        firsts = merged_first
+        rows += len(batch)
+    if not rows:
+        add_intervals(gaze_time, hand_activity, intervals)
+        return gaze_time, hand_activity
+
+    # The mode of a second is its pair with the highest count, ties going to
+    # the label seen first in that second (Counter.most_common order).
+    names = list(index)
+    pair_sec = pairs >> LABEL_BITS
+    order = np.lexsort((firsts, -counts, pair_sec))
+    leaders = order[np.r_[True, pair_sec[order][1:] != pair_sec[order][:-1]]]
+    sec_starts = np.flatnonzero(np.r_[True, pair_sec[1:] != pair_sec[:-1]])
+    sec_first = np.minimum.reduceat(firsts, sec_starts)
+    modes = (pairs[leaders] & ((1 << LABEL_BITS) - 1))[np.argsort(sec_first, kind="stable")]
+
+    seconds = np.bincount(modes)
+    for code in first_appearance_order(modes):
+        gaze_time[names[code]] = timedelta(seconds=int(seconds[code]))
+        if "hand" in names[code].lower():
+            hand_activity[names[code]] = int(seconds[code])
+
+    add_intervals(gaze_time, hand_activity, intervals)
+    return gaze_time, hand_activity
+
+# --------- Analyze & Report ---------
+def analyze_data(screen_logs, face_logs, columnar=None):
+    if columnar is None:
+        columnar = np is not None
+    if columnar:
+        time_per_window, typed_keys, mouse_clicks = aggregate_screen_columnar(screen_logs)
+        gaze_time, hand_activity = aggregate_face_columnar(face_logs)
+    else:
+        time_per_window, typed_keys, mouse_clicks = aggregate_screen(screen_logs)
+        gaze_time, hand_activity = aggregate_face(face_logs)
+    return build_report(time_per_window, typed_keys, mouse_clicks, gaze_time, hand_activity)
+
+def build_report(time_per_window, typed_keys, mouse_clicks, gaze_time, hand_activity):
+    report = []
+
     report.append("USER ACTIVITY REPORT\n" + "="*60)
 
     report.append("\n1. TIME SPENT ON APPLICATIONS / WEBSITES:\n")
     for win, dur in sorted(time_per_window.items(), key=lambda x: x[1], reverse=True):
         report.append(f" - {win}: {dur}")
 
+    time_per_category = defaultdict(timedelta)
+    for win, dur in time_per_window.items():
+        category = app_classifier.category(win)
+        if category:
+            time_per_category[category] += dur
+    if time_per_category:
+        report.append("\n   By category:")
+        for category, dur in sorted(time_per_category.items(), key=lambda x: x[1], reverse=True):
+            report.append(f"   - {category}: {dur}")
+
     report.append("\n2. TYPING ACTIVITY:\n")
     for win, keys in typed_keys.items():
         key_tokens, full_text = normalize_keys(keys)
@@ -150,13 +358,291 @@ def analyze_data(screen_logs, face_logs):
 
     return '\n'.join(report)
 
+# --------- Incremental Aggregation ---------
+# For live sessions the report can be refreshed from a checkpoint holding the
+# byte offset reached in each log plus the aggregates so far; a refresh only
+# parses what was appended since. The checkpoint stays small: it holds the
+# counters and read offsets only (an event log's string tables are reread
+# from the log, see EventCursor.resume), while typed keys are appended to a
+# <checkpoint>.keys file of JSON [window, keys] lines, valid up to the
+# checkpoint's keys_size. Entries are consumed only once complete
+# (screen entries end with the separator, face lines with a newline). Face
+# seconds stay open for REORDER_SECONDS so frames arriving slightly out of
+# order still land in the right per-second vote.
+REORDER_SECONDS = 2
+
+def iter_text_tail(path, offset, terminator, chunk_size=CHUNK_SIZE):
+    with open(path, "rb") as f:
+        f.seek(offset)
+        pending = b""
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            pending += chunk
+            start = 0
+            while True:
+                end = pending.find(terminator, start)
+                if end == -1:
+                    break
+                end += len(terminator)
+                offset += end - start
+                yield pending[start:end].decode("utf-8"), offset
+                start = end
+            pending = pending[start:]
+
+class ActivityAggregates:
+    COUNTERS = ("time_per_window", "mouse_clicks", "gaze_seconds", "hand_activity")
+
+    def __init__(self):
+        self.time_per_window = {}    # window -> microseconds
+        self.typed_keys = {}
+        self.mouse_clicks = {}
+        self.gaze_seconds = {}
+        self.hand_activity = {}      # state -> seconds (fractional from intervals)
+        self.last_screen = None      # last entry; its duration is still unknown
+        self.open_seconds = {}       # second -> {activity: frames}
+        self.sources = {}            # log path -> read position
+        self.keys_size = 0           # bytes of the .keys file the checkpoint covers
+        self._saved_keys = {}        # window -> typed_keys entries already in it
+
+    # ---- screen log ----
+    def add_screen(self, entry):
+        if self.last_screen is not None:
+            cur = self.last_screen
+            window = cur["window"]
+            duration = (entry["timestamp"] - EPOCH) // ONE_US - cur["us"]
+            self.time_per_window[window] = self.time_per_window.get(window, 0) + duration
+            if cur["keys"] is not None:
+                self.typed_keys.setdefault(window, []).append(cur["keys"])
+            if cur["clicked"]:
+                self.mouse_clicks[window] = self.mouse_clicks.get(window, 0) + 1
+        keys = entry.get("Keys Pressed", "[]")
+        self.last_screen = {
+            "us": (entry["timestamp"] - EPOCH) // ONE_US,
+            "window": entry.get("Active Window", "Unknown"),
+            "keys": keys if has_entries(keys) else None,
+            "clicked": has_entries(entry.get("Mouse Clicks", "[]")),
+        }
+
+    # ---- face log ----
+    def add_face(self, entry):
+        if "end" in entry:  # interval from a run-length log: no vote needed
+            seconds = (entry["end"] - entry["timestamp"]).total_seconds()
+            activity = entry["activity"]
+            self.gaze_seconds[activity] = self.gaze_seconds.get(activity, 0) + seconds
+            if "hand" in activity.lower():
+                self.hand_activity[activity] = self.hand_activity.get(activity, 0) + seconds
+            return
+        second = (entry["timestamp"] - EPOCH) // ONE_US // 1_000_000
+        votes = self.open_seconds.setdefault(second, {})
+        votes[entry["activity"]] = votes.get(entry["activity"], 0) + 1
+        for sec in [s for s in self.open_seconds if s < second - REORDER_SECONDS]:
+            self._close_second(self.gaze_seconds, self.hand_activity, self.open_seconds.pop(sec))
+
+    @staticmethod
+    def _close_second(gaze_seconds, hand_activity, votes):
+        common = Counter(votes).most_common(1)[0][0]
+        gaze_seconds[common] = gaze_seconds.get(common, 0) + 1
+        if "hand" in common.lower():
+            hand_activity[common] = hand_activity.get(common, 0) + 1
+
+    # ---- reading appended data ----
+    def consume(self, path, kind):
+        state = self.sources.get(path, {"offset": 0})
+        if os.path.getsize(path) < state["offset"]:
+            raise ValueError(f"{path} shrank since the last checkpoint; rebuild without it")
+        if is_event_log(path):
+            cursor = EventCursor.resume(path, state)
+            events = iter_screen_events(path, cursor) if kind == "screen" else iter_vision_events(path, cursor)
+            add = self.add_screen if kind == "screen" else self.add_face
+            for entry in events:
+                add(entry)
+            self.sources[path] = cursor.to_dict()
+            return
+        offset = state["offset"]
+        if kind == "screen":
+            for text, offset in iter_text_tail(path, offset, ENTRY_SEPARATOR.encode("utf-8")):
+                entry = parse_screen_entry(text[:-len(ENTRY_SEPARATOR)])
+                if entry is not None:
+                    self.add_screen(entry)
+        else:
+            for line, offset in iter_text_tail(path, offset, b"\n"):
+                try:
+                    ts, activity = line.strip().split(" - ", 1)
+                    self.add_face({"timestamp": datetime.strptime(ts, "%Y-%m-%d %H:%M:%S"), "activity": activity})
+                except:
+                    continue
+        self.sources[path] = {"offset": offset}
+
+    # ---- merging (fleet reports) ----
+    def finalize(self):
+        for votes in self.open_seconds.values():
+            self._close_second(self.gaze_seconds, self.hand_activity, votes)
+        self.open_seconds = {}
+
+    def merge(self, other):
+        other.finalize()
+        for name in self.COUNTERS:
+            totals = getattr(self, name)
+            for key, value in getattr(other, name).items():
+                totals[key] = totals.get(key, 0) + value
+        for window, keys in other.typed_keys.items():
+            self.typed_keys.setdefault(window, []).extend(keys)
+        return self
+
+    # ---- report & persistence ----
+    def report(self):
+        gaze_seconds, hand_activity = dict(self.gaze_seconds), dict(self.hand_activity)
+        for votes in self.open_seconds.values():
+            self._close_second(gaze_seconds, hand_activity, votes)
+        return build_report(
+            {w: timedelta(microseconds=us) for w, us in self.time_per_window.items()},
+            self.typed_keys, self.mouse_clicks,
+            {g: timedelta(seconds=n) for g, n in gaze_seconds.items()},
+            {h: round(n) for h, n in hand_activity.items()})
+
+    def to_dict(self):
+        state = {name: getattr(self, name) for name in self.COUNTERS}
+        state["last_screen"] = self.last_screen
+        state["open_seconds"] = [[sec, votes] for sec, votes in self.open_seconds.items()]
+        state["sources"] = self.sources
+        state["keys_size"] = self.keys_size
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        aggregates = cls()
+        for name in cls.COUNTERS + ("last_screen", "sources", "keys_size"):
+            if name in state:
+                setattr(aggregates, name, state[name])
+        aggregates.open_seconds = {sec: votes for sec, votes in state["open_seconds"]}
+        # checkpoints from before the .keys file carry typed_keys inline; the next save moves them out
+        aggregates.typed_keys = state.get("typed_keys", {})
+        return aggregates
+
+    def _append_keys(self, keys_path):
+        # Only the typed keys added since the last save; anything past keys_size
+        # was written by a save whose checkpoint never landed, so it is dropped
+        rows = []
+        for window, keys in self.typed_keys.items():
+            rows.extend(json.dumps([window, k], ensure_ascii=False) + "\n"
+                        for k in keys[self._saved_keys.get(window, 0):])
+        with open(keys_path, "r+b" if os.path.exists(keys_path) else "wb") as f:
+            f.truncate(self.keys_size)
+            f.seek(self.keys_size)
+            f.write("".join(rows).encode("utf-8"))
+            self.keys_size = f.tell()
+        self._saved_keys = {window: len(keys) for window, keys in self.typed_keys.items()}
+
+    def save(self, path):
+        self._append_keys(path + ".keys")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "r", encoding="utf-8") as f:
+            aggregates = cls.from_dict(json.load(f))
+        if aggregates.keys_size:
+            with open(path + ".keys", "rb") as f:
+                rows = f.read(aggregates.keys_size).decode("utf-8").splitlines()
+            for row in rows:
+                window, keys = json.loads(row)
+                aggregates.typed_keys.setdefault(window, []).append(keys)
+            aggregates._saved_keys = {window: len(keys) for window, keys in aggregates.typed_keys.items()}
+        return aggregates
+
+def refresh_report(screen_path, face_path, state_path):
+    aggregates = ActivityAggregates.load(state_path)
+    aggregates.consume(screen_path, "screen")
+    aggregates.consume(face_path, "face")
+    aggregates.save(state_path)
+    return aggregates.report()
+
+def write_report(text, path=report_output_path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    print(f"✅ Report successfully saved to:\n{path}")
+
+# --------- Fleet Batch Mode ---------
+# Session logs are collected as <root>/<user>/<session>/..., one screen log
+# and one face log per session directory. Each session is parsed and
+# aggregated in a worker process; the per-session aggregates are then
+# merged per user and fleet-wide.
+SCREEN_LOG_NAMES = ("sop_activity_log.evt", "sop_activity_log.txt")
+FACE_LOG_NAMES = ("vision_activity_log.evt", "activity_log.evt", "vision_activity_log.txt", "activity_log.txt")
+
+def find_sessions(root):
+    sessions = []
+    for dirpath, _, filenames in os.walk(root):
+        screen = next((n for n in SCREEN_LOG_NAMES if n in filenames), None)
+        face = next((n for n in FACE_LOG_NAMES if n in filenames), None)
+        if not screen and not face:
+            continue
+        relative = os.path.relpath(dirpath, root)
+        user = relative.split(os.sep)[0] if relative != "." else "unknown"
+        sessions.append((user,
+                         os.path.join(dirpath, screen) if screen else None,
+                         os.path.join(dirpath, face) if face else None))
+    return sorted(sessions, key=lambda s: (s[0], s[1] or s[2]))
+
+def analyze_session(session):
+    user, screen_path, face_path = session
+    aggregates = ActivityAggregates()
+    if screen_path:
+        aggregates.consume(screen_path, "screen")
+    if face_path:
+        aggregates.consume(face_path, "face")
+    aggregates.finalize()
+    aggregates.last_screen, aggregates.sources = None, {}
+    return user, aggregates
+
+def run_batch(root, output_dir, workers=None):
+    sessions = find_sessions(root)
+    if not sessions:
+        print(f"No session logs found under {root}")
+        return
+    os.makedirs(output_dir, exist_ok=True)
+
+    per_user, fleet = {}, ActivityAggregates()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for user, aggregates in pool.map(analyze_session, sessions, chunksize=max(1, len(sessions) // 64)):
+            per_user.setdefault(user, ActivityAggregates()).merge(aggregates)
+
+    for user, aggregates in per_user.items():
+        write_report(aggregates.report(), os.path.join(output_dir, f"{user}_activity_report.txt"))
+        fleet.merge(aggregates)
+    write_report(fleet.report(), os.path.join(output_dir, "fleet_activity_report.txt"))
+    print(f"📊 {len(sessions)} session(s) from {len(per_user)} user(s) analyzed")
+
 # --------- Main Execution ---------
 if __name__ == "__main__":
-    screen_logs = parse_screen_activity(screen_file_path)
-    face_logs = parse_face_activity(face_file_path)
-    final_report = analyze_data(screen_logs, face_logs)
-
-    with open(report_output_path, "w", encoding="utf-8") as f:
-        f.write(final_report)
+    parser = argparse.ArgumentParser(description="Build the user activity report.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="resume from the checkpoint and only parse newly appended log data")
+    parser.add_argument("--watch", type=float, metavar="MINUTES",
+                        help="keep refreshing the report incrementally every MINUTES")
+    parser.add_argument("--batch", metavar="DIR",
+                        help="analyze every session under DIR/<user>/<session>/ in parallel")
+    parser.add_argument("--output", metavar="DIR", default="D:/FleetReports",
+                        help="where --batch writes per-user and fleet reports")
+    parser.add_argument("--workers", type=int, help="worker processes for --batch (default: all cores)")
+    args = parser.parse_args()
 
-    print(f"✅ Report successfully saved to:\n{report_output_path}")
+    if args.batch:
+        run_batch(args.batch, args.output, args.workers)
+    elif args.watch:
+        while True:
+            write_report(refresh_report(screen_file_path, face_file_path, checkpoint_path))
+            time.sleep(args.watch * 60)
+    elif args.incremental:
+        write_report(refresh_report(screen_file_path, face_file_path, checkpoint_path))
+    else:
+        screen_logs = iter_screen_activity(screen_file_path)
+        face_logs = iter_face_activity(face_file_path)
+        write_report(analyze_data(screen_logs, face_logs))
@@ -0,0 +1,249 @@
+import argparse
+import os
+import struct
+import time
+import zlib
+
+import cv2
+import numpy as np
+
+# === TILE DELTA RECORDING FORMAT ===
+# Desktop frames mostly repeat, so instead of encoding every frame this
+# format splits it into tile x tile squares and stores only the tiles that
+# differ from the previous frame (zlib-compressed raw BGR, lossless for
+# OCR). Every `keyframe_interval` frames all tiles are stored so readers
+# can seek without replaying the whole file.
+#
+#   MAGIC, HEADER (width, height, tile, fps, keyframe interval)
+#   per frame:  FRAME (kind, frame index, tile count, body length)
+#               tile count x [TILE (column, row, data length), zlib data]
+#
+# The writer flushes every `flush_interval` seconds, so a crash loses at
+# most that much; the reader ignores a frame cut off at the end of the file.
+#
+# TileVideoReader mimics the cv2.VideoCapture calls the analysis scripts
+# use (read/grab/retrieve/get/set/release), so FrameSampler, video_to_text
+# and analyze_video work on either format through open_recording().
+
+MAGIC = b"UATILE1\n"
+HEADER = struct.Struct("<IIHfI")
+FRAME = struct.Struct("<BIII")
+TILE = struct.Struct("<HHI")
+KEYFRAME, DELTA = 1, 2
+
+
+def is_tile_recording(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def open_recording(path):
+    return TileVideoReader(path) if is_tile_recording(path) else cv2.VideoCapture(path)
+
+
+class TileWriter:
+    def __init__(self, path, fps, frame_size, tile=64, keyframe_interval=None, level=1, flush_interval=5.0):
+        self.width, self.height = frame_size
+        self.tile = tile
+        self.level = level
+        self.keyframe_interval = keyframe_interval or max(1, int(fps * 10))  # default: every 10 s
+        self.cols = -(-self.width // tile)
+        self.rows = -(-self.height // tile)
+        # Padded to whole tiles; _last holds the frame readers will have rebuilt
+        self._frame = np.zeros((self.rows * tile, self.cols * tile, 3), np.uint8)
+        self._last = np.zeros_like(self._frame)
+        # Compare 4 bytes at a time when a tile row is a whole number of words
+        self._words = (tile * 3) % 4 == 0
+        self._file = open(path, "wb")
+        self._file.write(MAGIC + HEADER.pack(self.width, self.height, tile, fps, self.keyframe_interval))
+        self.frames = self.keyframes = self.tiles_written = 0
+        self.bytes_written = len(MAGIC) + HEADER.size
+        self.encode_time = 0.0
+        self.flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+
+    def _changed_tiles(self):
+        if self._words:
+            now = self._frame.reshape(len(self._frame), -1).view(np.uint32).reshape(self.rows, self.tile, self.cols, -1)
+            last = self._last.reshape(len(self._last), -1).view(np.uint32).reshape(self.rows, self.tile, self.cols, -1)
+        else:
+            now = self._frame.reshape(self.rows, self.tile, self.cols, -1)
+            last = self._last.reshape(self.rows, self.tile, self.cols, -1)
+        return (now != last).any(axis=(1, 3))
+
+    def write(self, frame):
+        start = time.perf_counter()
+        if frame.shape[:2] != (self.height, self.width):
+            frame = cv2.resize(frame, (self.width, self.height), interpolation=cv2.INTER_AREA)
+        self._frame[:self.height, :self.width] = frame
+
+        key = self.frames % self.keyframe_interval == 0
+        if key:
+            rows, cols = np.indices((self.rows, self.cols)).reshape(2, -1)
+        else:
+            rows, cols = np.nonzero(self._changed_tiles())
+
+        t, parts = self.tile, []
+        for row, col in zip(rows.tolist(), cols.tolist()):
+            block = self._frame[row * t:(row + 1) * t, col * t:(col + 1) * t]
+            data = zlib.compress(block.tobytes(), self.level)
+            parts.append(TILE.pack(col, row, len(data)))
+            parts.append(data)
+            self._last[row * t:(row + 1) * t, col * t:(col + 1) * t] = block
+        body = b"".join(parts)
+        record = FRAME.pack(KEYFRAME if key else DELTA, self.frames, len(rows), len(body)) + body
+        self._file.write(record)
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self._file.flush()
+            self._last_flush = time.monotonic()
+
+        self.frames += 1
+        self.keyframes += key
+        self.tiles_written += len(rows)
+        self.bytes_written += len(record)
+        self.encode_time += time.perf_counter() - start
+
+    def release(self):
+        self._file.close()
+
+    def summary(self):
+        total_tiles = self.frames * self.rows * self.cols or 1
+        average = self.encode_time / self.frames * 1000 if self.frames else 0.0
+        return (f"{self.frames} frames ({self.keyframes} keyframes), "
+                f"{self.tiles_written / total_tiles * 100:.1f}% of tiles stored, "
+                f"{self.bytes_written / 1e6:.1f} MB, {average:.1f} ms/frame")
+
+
+class TileVideoReader:
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        if self._file.read(len(MAGIC)) != MAGIC:
+            self._file.close()
+            raise ValueError(f"{path} is not a tile recording")
+        self.width, self.height, self.tile, self.fps, self.keyframe_interval = HEADER.unpack(
+            self._file.read(HEADER.size))
+        cols, rows = -(-self.width // self.tile), -(-self.height // self.tile)
+        self._canvas = np.zeros((rows * self.tile, cols * self.tile, 3), np.uint8)
+
+        # Index frame offsets (bodies are skipped, not read); a frame whose
+        # body runs past the end of the file was cut off by a crash
+        self._offsets, self._keyframes = [], []
+        offset = self._file.tell()
+        size = os.fstat(self._file.fileno()).st_size
+        while True:
+            head = self._file.read(FRAME.size)
+            if len(head) < FRAME.size:
+                break
+            kind, _, _, length = FRAME.unpack(head)
+            if offset + FRAME.size + length > size:
+                break
+            if kind == KEYFRAME:
+                self._keyframes.append(len(self._offsets))
+            self._offsets.append(offset)
+            offset += FRAME.size + length
+            self._file.seek(offset)
+        self._pos = 0
+        self._file.seek(self._offsets[0] if self._offsets else offset)
+        self.tiles_changed = 0  # tiles updated since the last retrieve()
+
+    def isOpened(self):
+        return not self._file.closed
+
+    def keyframe_indexes(self):
+        return list(self._keyframes)
+
+    def grab(self):
+        if self._pos >= len(self._offsets):
+            return False
+        head = self._file.read(FRAME.size)
+        _, _, count, length = FRAME.unpack(head)
+        body = self._file.read(length)
+        t, pos = self.tile, 0
+        for _ in range(count):
+            col, row, size = TILE.unpack_from(body, pos)
+            pos += TILE.size
+            block = np.frombuffer(zlib.decompress(body[pos:pos + size]), np.uint8).reshape(t, t, 3)
+            self._canvas[row * t:(row + 1) * t, col * t:(col + 1) * t] = block
+            pos += size
+        self.tiles_changed += count
+        self._pos += 1
+        return True
+
+    def retrieve(self, image=None):
+        frame = self._canvas[:self.height, :self.width]
+        self.tiles_changed = 0
+        if image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            return True, image
+        return True, frame.copy()
+
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self._offsets))
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self._pos)
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return self._pos / self.fps * 1000.0
+        return 0.0
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            target = int(round(value / 1000.0 * self.fps))
+        elif prop == cv2.CAP_PROP_POS_FRAMES:
+            target = int(value)
+        else:
+            return False
+        target = max(0, min(target, len(self._offsets)))
+        # Decode from the last keyframe at or before the target. Only when the
+        # reader already sits between that keyframe and the target (same
+        # keyframe interval, seeking forward) is continuing from here shorter.
+        start = max((k for k in self._keyframes if k <= target), default=0)
+        if self._pos > target or self._pos < start:
+            self._pos = start
+            self._file.seek(self._offsets[start] if start < len(self._offsets) else 0)
+        while self._pos < target:
+            self.grab()
+        return True
+
+    def release(self):
+        self._file.close()
+
+
+# === CONVERT / COMPARE: tile recording vs. the original video ===
+def convert(video_path, output_path, tile=64, keyframe_seconds=10):
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 20.0
+    size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    writer = TileWriter(output_path, fps, size, tile, int(fps * keyframe_seconds))
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        writer.write(frame)
+    cap.release()
+    writer.release()
+    print(f"[TILES] {writer.summary()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a screen recording to the tile delta format.")
+    parser.add_argument("video")
+    parser.add_argument("output")
+    parser.add_argument("--tile", type=int, default=64)
+    parser.add_argument("--keyframe-seconds", type=float, default=10)
+    args = parser.parse_args()
+    convert(args.video, args.output, args.tile, args.keyframe_seconds)
@@ -2,6 +2,11 @@ import cv2
 import mediapipe as mp
 import datetime
 import os
+from activity_events import EventWriter, VisionIntervalLog
+from face_features import LandmarkArchive
+from frame_encoder import FrameEncoder
+from vision_replay import ActivityDescriber, FrameClock, open_frame_source, replay_output_path
+from vision_scheduler import VisionScheduler
 
 # Initialize mediapipe
 mp_face = mp.solutions.face_mesh
@@ -9,73 +14,55 @@ mp_hands = mp.solutions.hands
 mp_drawing = mp.solutions.drawing_utils
 
 # Setup webcam and output paths
-cap = cv2.VideoCapture(0)
-fourcc = cv2.VideoWriter_fourcc(*'XVID')
-video_path = 'D:/activity_detected.avi'
-log_path = 'D:/activity_log.txt'
-out = cv2.VideoWriter(video_path, fourcc, 10.0, (640, 480))
+VISION_SOURCE = 0  # webcam index, or a recording / image folder to replay as fast as it decodes
+cap = open_frame_source(VISION_SOURCE)
+video_path = replay_output_path(VISION_SOURCE, 'D:/activity_detected.avi')  # never the file being replayed
+log_path = 'D:/activity_log.evt'
+landmark_dir = 'D:/activity_landmarks'  # per-frame face landmarks (.npy segments) for offline re-analysis
+VIDEO_OVERFLOW = "drop_oldest"  # encoder queue full: "block", "drop_oldest" or "drop_newest"
+out = FrameEncoder(video_path, 10.0, (640, 480), "XVID", overflow=VIDEO_OVERFLOW)  # encodes off the capture loop
 
 # Prepare MediaPipe models
-face_mesh = mp_face.FaceMesh(min_detection_confidence=0.5, min_tracking_confidence=0.5)
+REFINE_LANDMARKS = True  # adds the iris points (478 instead of 468) so gaze can be recomputed from the archive
+face_mesh = mp_face.FaceMesh(refine_landmarks=REFINE_LANDMARKS, min_detection_confidence=0.5, min_tracking_confidence=0.5)
 hands = mp_hands.Hands(min_detection_confidence=0.5, min_tracking_confidence=0.5)
+VISION_PROFILE = "balanced"  # "accuracy", "balanced" or "low_cpu": how often face/hand models run
+vision_scheduler = VisionScheduler(face_mesh, hands, VISION_PROFILE)
+describe_activity = ActivityDescriber(keep_points=True)  # face work redone only when face results change
 
 # Open log file
-log_file = open(log_path, "w")
+VISION_HEARTBEAT = 30  # seconds; an unchanged state is still written out this often (None = only on change)
+log_file = VisionIntervalLog(EventWriter(log_path, batch_size=16), VISION_HEARTBEAT)
+landmark_archive = LandmarkArchive(landmark_dir)
 
 start_time = datetime.datetime.now()
-duration = 30  # seconds
+duration = 30  # seconds of webcam recording; a replayed source runs to its end
+clock = FrameClock(cap, VISION_SOURCE)  # wall time live, source time for a replay
+live = clock.live
 
 print("Silent recording started...")
 
-while (datetime.datetime.now() - start_time).seconds < duration:
+while not live or (datetime.datetime.now() - start_time).seconds < duration:
     ret, frame = cap.read()
     if not ret:
         break
+    timestamp = clock()
 
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    face_results = face_mesh.process(frame_rgb)
-    hand_results = hands.process(frame_rgb)
+    # Models run on the scheduler's cadence; skipped frames reuse the last results
+    face_results, hand_results, inferred = vision_scheduler.process(frame)
 
-    activity_text = []
+    # Face (eyes, head yaw) and hand labels, shared with the replay benchmark
+    activity = describe_activity(face_results, hand_results)
+    if describe_activity.face_points and "face" in inferred:  # archive fresh results only
+        landmark_archive.append(timestamp, describe_activity.face_points[0])
 
-    # Face detection
-    if face_results.multi_face_landmarks:
-        activity_text.append("Face detected")
-
-        for face_landmarks in face_results.multi_face_landmarks:
-            # Eye detection
-            left_eye = face_landmarks.landmark[159]
-            right_eye = face_landmarks.landmark[386]
-
-            if left_eye.y < face_landmarks.landmark[145].y and right_eye.y < face_landmarks.landmark[374].y:
-                activity_text.append("Eyes open")
-            else:
-                activity_text.append("Eyes possibly closed")
-
-            # Gaze direction estimation
-            nose_tip = face_landmarks.landmark[1]
-            if nose_tip.x < 0.4:
-                activity_text.append("Looking right")
-            elif nose_tip.x > 0.6:
-                activity_text.append("Looking left")
-            else:
-                activity_text.append("Looking at screen")
-
-            mp_drawing.draw_landmarks(frame, face_landmarks, mp_face.FACEMESH_CONTOURS)
-    else:
-        activity_text.append("No face detected")
-
-    # Hand detection
-    if hand_results.multi_hand_landmarks:
-        activity_text.append(f"{len(hand_results.multi_hand_landmarks)} hand(s) detected")
-        for hand_landmarks in hand_results.multi_hand_landmarks:
-            mp_drawing.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-    else:
-        activity_text.append("No hands detected")
+    for face_landmarks in face_results.multi_face_landmarks or []:
+        mp_drawing.draw_landmarks(frame, face_landmarks, mp_face.FACEMESH_CONTOURS)
+    for hand_landmarks in hand_results.multi_hand_landmarks or []:
+        mp_drawing.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
 
     # Log activity to file with timestamp
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_file.write(f"{timestamp} - {', '.join(activity_text)}\n")
+    log_file.vision_frame(timestamp, activity, inferred)
 
     # Save frame to video file
     out.write(frame)
@@ -89,10 +76,16 @@ while (datetime.datetime.now() - start_time).seconds < duration:
 # Cleanup
 cap.release()
 out.release()
+print(f"Encoder: {out.summary()}")
+print(f"Vision scheduler: {vision_scheduler.summary()}")
+print(f"Activity log: {log_file.summary()}")
 cv2.destroyAllWindows()
+vision_scheduler.close()
 face_mesh.close()
 hands.close()
 log_file.close()
+landmark_archive.close()
 
 print(f"Silent recording finished. Video saved to: {video_path}")
 print(f"Activity log saved to: {log_path}")
+print(f"Landmarks saved to: {landmark_dir} ({landmark_archive.frames} frames)")
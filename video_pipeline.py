@@ -0,0 +1,200 @@
+import heapq
+import queue
+import threading
+import time
+
+# === STAGED VIDEO PIPELINE ===
+# decode -> preprocess (worker pool) -> inference -> ordered writer
+#
+# Stages are threads joined by bounded queues, so a slow stage applies
+# backpressure instead of letting frames pile up in memory. OpenCV, torch
+# and the Tesseract subprocess all release the GIL, so the stages really
+# overlap and wall time approaches the cost of the slowest stage.
+#
+#   source      iterable run on the decoder thread (e.g. a FrameSampler);
+#               anything order-dependent (change gating) belongs here
+#   preprocess  item -> item, run by `workers` threads, may finish out of order
+#   infer       [items] -> [results], called with up to `batch_size` items
+#   write       result -> None, called on the caller's thread in source order
+#
+# A batch is cut when it is full, or `batch_wait` seconds after its first
+# item arrived. Cutting it as soon as the input queue is empty would hand
+# infer() one item at a time whenever decoding is the slower stage.
+
+_DONE = object()
+
+
+class StageStats:
+    def __init__(self, name, workers=1):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy = 0.0
+        self.max_queue = 0
+        self.batches = 0
+        self._lock = threading.Lock()
+
+    def add(self, items, seconds, batches=0):
+        with self._lock:
+            self.items += items
+            self.busy += seconds
+            self.batches += batches
+
+    def line(self, wall):
+        utilization = self.busy / (wall * self.workers) * 100 if wall else 0.0
+        line = (f"{self.name:<11} {self.items:>7} items  {self.busy:8.2f}s busy  "
+                f"{utilization:5.1f}% utilized  peak output queue {self.max_queue}")
+        if self.batches:
+            line += f"  avg batch {self.items / self.batches:.1f}"
+        return line
+
+
+class VideoPipeline:
+    def __init__(self, preprocess, infer, write, workers=2, queue_size=16, batch_size=1, batch_wait=0.5):
+        self.preprocess = preprocess
+        self.infer = infer
+        self.write = write
+        self.workers = workers
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.stats = [StageStats("decode"), StageStats("preprocess", workers),
+                      StageStats("inference"), StageStats("write")]
+        self.wall = 0.0
+        self._error = None
+        self._stop = threading.Event()
+
+    def _put(self, q, item, stats):
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                stats.max_queue = max(stats.max_queue, q.qsize())
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fail(self, error):
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    def _decode(self, source, out_q):
+        stats = self.stats[0]
+        try:
+            iterator = iter(source)
+            seq = 0
+            while True:
+                start = time.perf_counter()
+                item = next(iterator, _DONE)
+                stats.add(0 if item is _DONE else 1, time.perf_counter() - start)
+                if item is _DONE or not self._put(out_q, (seq, item), stats):
+                    break
+                seq += 1
+        except Exception as e:
+            self._fail(e)
+        finally:
+            for _ in range(self.workers):
+                self._put(out_q, _DONE, stats)
+
+    def _preprocess(self, in_q, out_q):
+        stats = self.stats[1]
+        try:
+            while not self._stop.is_set():
+                try:
+                    job = in_q.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if job is _DONE:
+                    break
+                seq, item = job
+                start = time.perf_counter()
+                item = self.preprocess(item)
+                stats.add(1, time.perf_counter() - start)
+                if not self._put(out_q, (seq, item), stats):
+                    break
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._put(out_q, _DONE, stats)
+
+    def _inference(self, in_q, out_q):
+        stats = self.stats[2]
+        running = self.workers
+        try:
+            while running and not self._stop.is_set():
+                batch, deadline = [], None
+                while running and len(batch) < self.batch_size:
+                    try:
+                        # block for the first item, then until the batch fills or batch_wait is up
+                        if not batch:
+                            job = in_q.get(timeout=0.1)
+                        else:
+                            job = in_q.get(timeout=max(0.0, deadline - time.perf_counter()))
+                    except queue.Empty:
+                        if batch or self._stop.is_set():
+                            break
+                        continue
+                    if job is _DONE:
+                        running -= 1
+                    else:
+                        batch.append(job)
+                        if deadline is None:
+                            deadline = time.perf_counter() + self.batch_wait
+                if not batch:
+                    continue
+                start = time.perf_counter()
+                results = self.infer([item for _, item in batch])
+                stats.add(len(batch), time.perf_counter() - start, batches=1)
+                for (seq, _), result in zip(batch, results):
+                    if not self._put(out_q, (seq, result), stats):
+                        return
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._put(out_q, _DONE, stats)
+
+    def run(self, source):
+        q_decoded = queue.Queue(self.queue_size)
+        q_prepared = queue.Queue(self.queue_size)
+        q_results = queue.Queue(self.queue_size)
+        threads = [threading.Thread(target=self._decode, args=(source, q_decoded), daemon=True)]
+        threads += [threading.Thread(target=self._preprocess, args=(q_decoded, q_prepared), daemon=True)
+                    for _ in range(self.workers)]
+        threads.append(threading.Thread(target=self._inference, args=(q_prepared, q_results), daemon=True))
+
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+
+        # Ordered writer: results may arrive out of order from the pool. If
+        # write() raises, the stages are still stopped and joined, so none is
+        # left blocked on a full queue.
+        stats, pending, next_seq = self.stats[3], [], 0
+        try:
+            while not self._stop.is_set():
+                try:
+                    job = q_results.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if job is _DONE:
+                    break
+                heapq.heappush(pending, job)
+                while pending and pending[0][0] == next_seq:
+                    _, result = heapq.heappop(pending)
+                    start = time.perf_counter()
+                    self.write(result)
+                    stats.add(1, time.perf_counter() - start)
+                    next_seq += 1
+        finally:
+            self._stop.set()
+            for t in threads:
+                t.join()
+            self.wall = time.perf_counter() - started
+        if self._error is not None:
+            raise self._error
+
+    def summary(self):
+        lines = [f"Pipeline wall time {self.wall:.2f}s"]
+        lines += ["  " + s.line(self.wall) for s in self.stats]
+        return "\n".join(lines)
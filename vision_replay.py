@@ -0,0 +1,229 @@
+import argparse
+import glob
+import os
+import time
+from datetime import datetime, timedelta
+
+import cv2
+import psutil
+
+from face_features import EAR_CLOSED, eye_aspect_ratio, head_pose, landmarks_array, looking_direction
+from latency_stats import LatencyStats
+from tile_recording import open_recording
+from vision_scheduler import PROFILES, VisionScheduler
+
+try:
+    import mediapipe as mp
+except ImportError:
+    mp = None
+
+# === OFFLINE REPLAY FOR THE VISION PIPELINE ===
+# open_frame_source() takes what the webcam scripts' VISION_SOURCE holds:
+#   0, 1, ...        a camera index (live, paced by the camera)
+#   "x.avi/.tiles"   a recording, e.g. activity_detected.avi
+#   "some/dir"       a directory of images, replayed in file-name order
+# Recordings and image directories are read as fast as they decode, so the
+# same face/hand analysis can be profiled or regression-tested headless.
+# A replay is logged in source time (FrameClock), and a recording is never
+# written over while it is being replayed (replay_output_path).
+# ActivityDescriber is the labelling both webcam scripts log, so
+# benchmark() runs exactly that analysis over a source. It reports
+# frames/sec, per-model latency percentiles and peak RSS.
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+def is_camera(source):
+    return isinstance(source, int) or (isinstance(source, str) and source.isdigit())
+
+
+class ImageDirectorySource:
+    # The cv2.VideoCapture calls the vision loops use, over a folder of images
+    def __init__(self, directory, fps=10.0):
+        self.paths = sorted(p for p in glob.glob(os.path.join(directory, "*"))
+                            if p.lower().endswith(IMAGE_EXTENSIONS))
+        self.fps = fps
+        self._pos = 0
+
+    def isOpened(self):
+        return bool(self.paths)
+
+    def read(self, image=None):
+        while self._pos < len(self.paths):
+            frame = cv2.imread(self.paths[self._pos])
+            self._pos += 1
+            if frame is not None:
+                return True, frame
+        return False, None
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self.paths))
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self._pos)
+        return 0.0
+
+    def release(self):
+        self._pos = len(self.paths)
+
+
+def open_frame_source(source):
+    if is_camera(source):
+        return cv2.VideoCapture(int(source))
+    if os.path.isdir(source):
+        return ImageDirectorySource(source)
+    return open_recording(source)
+
+
+def replay_output_path(source, output_path):
+    # The scripts record the annotated video to output_path; replaying that
+    # same file would truncate it while it is read, so record beside it
+    if is_camera(source) or not (os.path.exists(source) and os.path.exists(output_path)):
+        return output_path
+    if not os.path.samefile(source, output_path):
+        return output_path
+    root, ext = os.path.splitext(output_path)
+    redirected = f"{root}_replay{ext}"
+    print(f"[REPLAY] {source} is the replay source; annotated video goes to {redirected}")
+    return redirected
+
+
+class FrameClock:
+    # Timestamp for each frame read: the wall clock for a camera; for a
+    # replay, the source's own time (frame index / fps from when the
+    # recording started, taken as its last write minus its duration)
+    def __init__(self, cap, source):
+        self.live = is_camera(source)
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 10.0
+        self.frames = 0
+        self.start = datetime.now()
+        if not self.live:
+            first = getattr(cap, "paths", [source])[:1]
+            if first and os.path.exists(first[0]):
+                self.start = datetime.fromtimestamp(os.path.getmtime(first[0]))
+            if os.path.isfile(source):
+                self.start -= timedelta(seconds=cap.get(cv2.CAP_PROP_FRAME_COUNT) / self.fps)
+
+    def __call__(self):
+        # call once per frame read
+        if self.live:
+            return datetime.now()
+        timestamp = self.start + timedelta(seconds=self.frames / self.fps)
+        self.frames += 1
+        return timestamp
+
+
+class TimedModel:
+    # Wraps a MediaPipe solution so every process() call is timed
+    def __init__(self, model):
+        self.model = model
+        self.latency = LatencyStats(window=None)
+
+    def process(self, rgb):
+        start = time.perf_counter()
+        results = self.model.process(rgb)
+        self.latency.add(time.perf_counter() - start)
+        return results
+
+
+class ActivityDescriber:
+    # The activity label the webcam scripts log for a frame. face_details
+    # adds eye state and looking direction per face (vedio to text.py);
+    # keep_points keeps each face's (N, 3) landmark array in face_points.
+    # The scheduler hands back the same results object on frames where a
+    # model was carried forward, so the face part (landmark arrays, EAR,
+    # head pose) is only recomputed when the face results change.
+    def __init__(self, face_details=True, keep_points=False):
+        self.face_details = face_details
+        self.keep_points = keep_points
+        self.face_points = []
+        self._face_results = self._face_text = None
+
+    def _describe_face(self, face_results):
+        if not face_results.multi_face_landmarks:
+            return ["No face detected"], []
+        face_text, face_points = ["Face detected"], []
+        if self.face_details or self.keep_points:
+            for face_landmarks in face_results.multi_face_landmarks:
+                points = landmarks_array(face_landmarks)
+                if self.keep_points:
+                    face_points.append(points)
+                if self.face_details:
+                    face_text.append("Eyes open" if eye_aspect_ratio(points).mean() > EAR_CLOSED
+                                     else "Eyes possibly closed")
+                    face_text.append(looking_direction(head_pose(points)[0]))
+        return face_text, face_points
+
+    def __call__(self, face_results, hand_results):
+        if face_results is not self._face_results:
+            self._face_text, self.face_points = self._describe_face(face_results)
+            self._face_results = face_results
+        if hand_results.multi_hand_landmarks:
+            hand_text = f"{len(hand_results.multi_hand_landmarks)} hand(s) detected"
+        else:
+            hand_text = "No hands detected"
+        return ', '.join(self._face_text + [hand_text])
+
+
+# === BENCHMARK: frames/sec, model latency, peak RSS ===
+def benchmark(source, profile="balanced", max_frames=None, refine_landmarks=True, track_face=False):
+    if mp is None:
+        raise SystemExit("mediapipe is required for the vision benchmark (pip install mediapipe)")
+    cap = open_frame_source(source)
+    if not cap.isOpened():
+        raise SystemExit(f"Can't read frames from {source}")
+    face_mesh = TimedModel(mp.solutions.face_mesh.FaceMesh(
+        refine_landmarks=refine_landmarks, min_detection_confidence=0.5, min_tracking_confidence=0.5))
+    hands = TimedModel(mp.solutions.hands.Hands(min_detection_confidence=0.5, min_tracking_confidence=0.5))
+    scheduler = VisionScheduler(face_mesh, hands, PROFILES[profile]._replace(track_face=track_face))
+    describe_activity = ActivityDescriber()
+    process = psutil.Process()
+    frame_time = LatencyStats(window=None)
+    states, peak_rss, frames = {}, 0, 0
+
+    start = time.perf_counter()
+    try:
+        while max_frames is None or frames < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            began = time.perf_counter()
+            face_results, hand_results, _ = scheduler.process(frame)
+            state = describe_activity(face_results, hand_results)
+            frame_time.add(time.perf_counter() - began)
+            states[state] = states.get(state, 0) + 1
+            frames += 1
+            peak_rss = max(peak_rss, process.memory_info().rss)
+    finally:
+        elapsed = time.perf_counter() - start
+        cap.release()
+        scheduler.close()
+        face_mesh.model.close()
+        hands.model.close()
+
+    # Windows tracks the true peak; elsewhere it's the highest per-frame sample
+    peak_rss = max(peak_rss, getattr(process.memory_info(), "peak_wset", 0))
+    print(f"[BENCH] {source}: {frames} frames in {elapsed:.2f}s = {frames / (elapsed or 1e-9):.1f} fps "
+          f"(profile {profile}{', face ROI tracking' if track_face else ''}), peak RSS {peak_rss / 2**20:.0f} MB")
+    for name, stats in (("frame", frame_time), ("face_mesh", face_mesh.latency), ("hands", hands.latency)):
+        if stats.count:
+            p50, p95, p99 = stats.percentiles(0.5, 0.95, 0.99)
+            print(f"[BENCH] {name:<9}: {stats.count:6d} calls, p50 {p50 * 1000:6.2f} ms, p95 {p95 * 1000:6.2f} ms, "
+                  f"p99 {p99 * 1000:6.2f} ms, max {stats.worst * 1000:6.2f} ms")
+    print(f"[BENCH] scheduler: {scheduler.summary()}")
+    for state, count in sorted(states.items(), key=lambda x: x[1], reverse=True):
+        print(f"[BENCH]   {count:6d} x {state}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recording or image folder through the face/hand pipeline.")
+    parser.add_argument("source", help="video / .tiles recording, image directory, or camera index")
+    parser.add_argument("--profile", default="balanced", choices=sorted(PROFILES))
+    parser.add_argument("--frames", type=int, help="stop after this many frames")
+    parser.add_argument("--no-refine", action="store_true", help="FaceMesh without iris landmarks")
+    parser.add_argument("--track-face", action="store_true",
+                        help="run FaceMesh on a tracked face crop (compare against a run without it)")
+    args = parser.parse_args()
+    benchmark(args.source, args.profile, args.frames, not args.no_refine, args.track_face)
@@ -0,0 +1,238 @@
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from frame_change import changed_pixels, thumbnail
+
+# === ADAPTIVE FACE / HAND INFERENCE SCHEDULER ===
+# Running FaceMesh and Hands on every full-resolution webcam frame keeps a
+# core busy, while a person at a desk changes slowly. The scheduler runs:
+#   - FaceMesh every `face_every` frames;
+#   - Hands every `hands_every` frames, but only while there is motion, a
+#     face or hands in view, plus a check every `hands_idle_every` frames;
+#   - both on a frame downscaled by `scale` (landmarks are normalized, so
+#     they still draw correctly on the full frame).
+# Between inferences the last results are carried forward. process()
+# returns which models actually ran so the vision log can record it.
+#
+# Each frame is converted once into a preallocated RGB buffer that both
+# models read. When both are due, FaceMesh runs on a worker thread while
+# Hands runs on the caller (MediaPipe releases the GIL while its graph
+# runs), so the frame costs about the slower model rather than the sum.
+#
+# With track_face, FaceMesh always gets a ROI_SIZE x ROI_SIZE square:
+#   - until it finds a face, the whole frame letterboxed into that square;
+#   - after that, a padded square around the last face box, cut from the
+#     full-resolution frame.
+# Landmarks are mapped back to full-frame coordinates. The square is moved
+# only when the face nears its edge or changes size, so between moves
+# FaceMesh's own tracker sees a stable image. If the crop holds no face,
+# the same frame is re-detected through the letterboxed square. Only the
+# first face is tracked (the person at the desk). Hands stay full-frame,
+# because a hand can enter anywhere.
+#
+# FaceMesh in video mode already tracks its own ROI and runs a fixed-size
+# landmark model, so the crop mostly saves colour conversion and resizing.
+# No profile enables track_face yet. Compare it on a real recording first
+# with `python vision_replay.py <recording> --track-face`.
+#
+# The profile is the CPU-versus-accuracy knob: "accuracy" runs both models
+# on every full frame (the old behaviour), "low_cpu" infers least often.
+
+SchedulerProfile = namedtuple("SchedulerProfile",
+                              "face_every hands_every hands_idle_every scale motion_pixels track_face")
+
+PROFILES = {
+    "accuracy": SchedulerProfile(face_every=1, hands_every=1, hands_idle_every=1, scale=1.0, motion_pixels=0,
+                                 track_face=False),
+    "balanced": SchedulerProfile(face_every=3, hands_every=2, hands_idle_every=15, scale=0.75, motion_pixels=8,
+                                 track_face=False),
+    "low_cpu": SchedulerProfile(face_every=6, hands_every=3, hands_idle_every=30, scale=0.5, motion_pixels=16,
+                                track_face=False),
+}
+
+
+class VisionScheduler:
+    MOTION_LEVEL = 20  # grey levels a 64x64 thumbnail pixel must change by to count as motion
+    ROI_PADDING = 0.4  # face-box sizes added around the tracked face on each side
+    ROI_SIZE = 256     # side of the square image FaceMesh gets when tracking
+    ROI_MARGIN = 0.1   # the square moves once the face box comes this close (fraction of side) to its edge
+
+    def __init__(self, face_mesh, hands, profile="balanced", concurrent=True):
+        self.profile = PROFILES[profile] if isinstance(profile, str) else profile
+        self.face_mesh = face_mesh
+        self.hands = hands
+        self.face_results = self.hand_results = None
+        self.frames = self.face_runs = self.hand_runs = self.both_runs = 0
+        self.face_time = self.hand_time = self.both_time = 0.0
+        self._last_face = self._last_hands = None
+        self._thumb = None
+        self._small = self._rgb = None  # reused conversion buffers
+        self._square = np.empty((self.ROI_SIZE, self.ROI_SIZE, 3), np.uint8)  # FaceMesh input when tracking
+        self._roi = None  # (x0, y0, side) square around the tracked face, full-frame pixels
+        self.roi_runs = self.redetects = self.losses = 0
+        self._face_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="face-mesh") if concurrent else None
+
+    def _motion(self, frame):
+        thumb = thumbnail(frame)
+        moved = self._thumb is None or changed_pixels(thumb, self._thumb, self.MOTION_LEVEL) > self.profile.motion_pixels
+        self._thumb = thumb
+        return moved
+
+    def _prepare(self, frame):
+        # BGR frame -> (downscaled) RGB in buffers reused across frames
+        height, width = frame.shape[:2]
+        if self.profile.scale != 1.0:
+            size = (max(1, int(width * self.profile.scale)), max(1, int(height * self.profile.scale)))
+            if self._small is None or self._small.shape[1::-1] != size:
+                self._small = np.empty((size[1], size[0], 3), np.uint8)
+            frame = cv2.resize(frame, size, dst=self._small, interpolation=cv2.INTER_AREA)
+        if self._rgb is None or self._rgb.shape != frame.shape:
+            self._rgb = np.empty_like(frame)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb)
+
+    def _run_face(self, rgb):
+        start = time.perf_counter()
+        results = self.face_mesh.process(rgb)
+        self.face_time += time.perf_counter() - start
+        return results
+
+    def _square_rgb(self, frame, x0, y0, side):
+        # Square (x0, y0, side) of the frame -> ROI_SIZE RGB, black where it leaves the frame
+        height, width = frame.shape[:2]
+        scale = self.ROI_SIZE / side
+        sx0, sy0 = max(0, x0), max(0, y0)
+        sx1, sy1 = min(width, x0 + side), min(height, y0 + side)
+        dx0, dy0 = int(round((sx0 - x0) * scale)), int(round((sy0 - y0) * scale))
+        dx1 = min(self.ROI_SIZE, max(dx0 + 1, int(round((sx1 - x0) * scale))))
+        dy1 = min(self.ROI_SIZE, max(dy0 + 1, int(round((sy1 - y0) * scale))))
+        square = self._square
+        square[:dy0] = 0
+        square[dy1:] = 0
+        square[:, :dx0] = 0
+        square[:, dx1:] = 0
+        visible = cv2.resize(frame[sy0:sy1, sx0:sx1], (dx1 - dx0, dy1 - dy0), interpolation=cv2.INTER_AREA)
+        square[dy0:dy1, dx0:dx1] = cv2.cvtColor(visible, cv2.COLOR_BGR2RGB)
+        return square
+
+    def _update_roi(self, results, shape):
+        if not (results and results.multi_face_landmarks):
+            self._roi = None
+            return
+        height, width = shape[:2]
+        points = results.multi_face_landmarks[0].landmark
+        xs = np.fromiter((p.x for p in points), np.float32, len(points)) * width
+        ys = np.fromiter((p.y for p in points), np.float32, len(points)) * height
+        left, right, top, bottom = xs.min(), xs.max(), ys.min(), ys.max()
+        size = max(right - left, bottom - top)
+        if self._roi is not None:
+            # Keep the square while the face stays inside its margin at about the same size
+            x0, y0, side = self._roi
+            margin = side * self.ROI_MARGIN
+            expected = side / (1 + 2 * self.ROI_PADDING)
+            if (left >= x0 + margin and top >= y0 + margin and right <= x0 + side - margin
+                    and bottom <= y0 + side - margin and 0.75 * expected <= size <= expected * 1.25):
+                return
+        side = max(2, int(size * (1 + 2 * self.ROI_PADDING)))
+        self._roi = (int((left + right - side) / 2), int((top + bottom - side) / 2), side)
+
+    @staticmethod
+    def _map_from_square(results, shape, x0, y0, side):
+        # Landmarks normalized to the square -> normalized to the full frame (z shares x's scale)
+        height, width = shape[:2]
+        ox, oy, sx, sy = x0 / width, y0 / height, side / width, side / height
+        for face in results.multi_face_landmarks:
+            for p in face.landmark:
+                p.x = ox + p.x * sx
+                p.y = oy + p.y * sy
+                p.z *= sx
+
+    def _run_square(self, frame, x0, y0, side):
+        results = self._run_face(self._square_rgb(frame, x0, y0, side))
+        if results.multi_face_landmarks:
+            self._map_from_square(results, frame.shape, x0, y0, side)
+        return results
+
+    def _detect_face(self, frame, rgb):
+        # rgb is the prepared full frame (only used without tracking)
+        if not self.profile.track_face:
+            return self._run_face(rgb)
+        if self._roi is not None:
+            results = self._run_square(frame, *self._roi)
+            if results.multi_face_landmarks:
+                self._update_roi(results, frame.shape)
+                self.roi_runs += 1
+                return results
+            self.losses += 1
+        # Whole frame, letterboxed into the same square
+        height, width = frame.shape[:2]
+        side = max(width, height)
+        results = self._run_square(frame, (width - side) // 2, (height - side) // 2, side)
+        self.redetects += 1
+        self._roi = None
+        self._update_roi(results, frame.shape)
+        return results
+
+    def _run_hands(self, rgb):
+        start = time.perf_counter()
+        results = self.hands.process(rgb)
+        self.hand_time += time.perf_counter() - start
+        return results
+
+    def process(self, frame):
+        # Returns (face results, hand results, names of the models inferred on this frame)
+        p, index = self.profile, self.frames
+        self.frames += 1
+        motion = self._motion(frame)
+
+        # Both decisions use the results carried in from earlier frames
+        run_face = self._last_face is None or index - self._last_face >= p.face_every
+        face_present = bool(self.face_results and self.face_results.multi_face_landmarks)
+        hands_present = bool(self.hand_results and self.hand_results.multi_hand_landmarks)
+        since = index - self._last_hands if self._last_hands is not None else p.hands_idle_every
+        run_hands = since >= p.hands_idle_every or (
+            since >= p.hands_every and (motion or face_present or hands_present))
+
+        if run_face or run_hands:
+            # A tracked face reads its own square, not the whole prepared frame
+            rgb = self._prepare(frame) if run_hands or not p.track_face else None
+            start = time.perf_counter()
+            if run_face and run_hands and self._face_worker is not None:
+                face_future = self._face_worker.submit(self._detect_face, frame, rgb)
+                self.hand_results = self._run_hands(rgb)
+                self.face_results = face_future.result()
+                self.both_runs += 1
+                self.both_time += time.perf_counter() - start
+            else:
+                if run_face:
+                    self.face_results = self._detect_face(frame, rgb)
+                if run_hands:
+                    self.hand_results = self._run_hands(rgb)
+        if run_face:
+            self.face_runs += 1
+            self._last_face = index
+        if run_hands:
+            self.hand_runs += 1
+            self._last_hands = index
+
+        inferred = tuple(name for name, ran in (("face", run_face), ("hands", run_hands)) if ran)
+        return self.face_results, self.hand_results, inferred
+
+    def close(self):
+        if self._face_worker is not None:
+            self._face_worker.shutdown()
+
+    def summary(self):
+        frames = self.frames or 1
+        face_ms = self.face_time / self.face_runs * 1000 if self.face_runs else 0.0
+        hand_ms = self.hand_time / self.hand_runs * 1000 if self.hand_runs else 0.0
+        return (f"{self.frames} frames: face inferred on {self.face_runs} ({self.face_runs / frames * 100:.0f}%, "
+                f"{face_ms:.1f} ms avg), hands on {self.hand_runs} ({self.hand_runs / frames * 100:.0f}%, "
+                f"{hand_ms:.1f} ms avg), carried forward otherwise"
+                + (f"; both concurrently on {self.both_runs} ({self.both_time / self.both_runs * 1000:.1f} ms avg)"
+                   if self.both_runs else "")
+                + (f"; face tracked in its ROI on {self.roi_runs}, full-frame detection on {self.redetects} "
+                   f"({self.losses} lost)" if self.profile.track_face else ""))